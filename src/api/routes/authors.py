@@ -1,13 +1,23 @@
-from typing import List
+from functools import partial
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config.constants import MAX_BULK_SIZE, MAX_RESOLVE_SIZE
+from core.batch import requested_ids, set_missing_ids
 from core.limiter import limiter
+from core.pagination import PageParams, set_next_cursor, set_total_count
+from core.streaming import ndjson_response, wants_ndjson
 from crud import authors
-from database.session import get_db_session
-from schemas import Author, AuthorCreate, AuthorUpdate
+from database.session import (
+    SessionFactory,
+    get_db_session,
+    get_read_db_session,
+    get_read_db_session_factory,
+)
+from schemas import Author, AuthorCreate, AuthorUpdate, BulkResult
 
 router = APIRouter(prefix="/authors")
 
@@ -23,10 +33,36 @@ async def create_author(
     return result
 
 
+@router.post("/bulk", response_model=List[BulkResult[Author]])
+@limiter.limit("10/second")
+async def create_authors(
+    request: Request,
+    params: Annotated[List[AuthorCreate], Body(min_length=1, max_length=MAX_BULK_SIZE)],
+    db: AsyncSession = Depends(get_db_session),
+) -> List[BulkResult[Author]]:
+    logger.info(f"Creating {len(params)} authors.")
+    result = await authors.create_authors(params, db)
+    logger.info(f"Created authors: {result}.")
+    return result
+
+
+@router.post("/resolve", response_model=List[Author])
+@limiter.limit("10/second")
+async def resolve_authors(
+    request: Request,
+    names: Annotated[List[str], Body(min_length=1, max_length=MAX_RESOLVE_SIZE)],
+    db: AsyncSession = Depends(get_db_session),
+) -> List[Author]:
+    logger.info(f"Resolving {len(names)} author names.")
+    result = await authors.resolve_authors(names, db)
+    logger.info(f"Resolved {len(result)} author names.")
+    return result
+
+
 @router.get("/{id}", response_model=Author)
 @limiter.limit("10/second")
 async def read_author(
-    request: Request, id: int, db: AsyncSession = Depends(get_db_session)
+    request: Request, id: int, db: AsyncSession = Depends(get_read_db_session)
 ) -> Author:
     logger.info(f"Fetching author with id: {id}.")
     result = await authors.read_author(id, db)
@@ -37,10 +73,31 @@ async def read_author(
 @router.get("/", response_model=List[Author])
 @limiter.limit("10/second")
 async def read_authors(
-    request: Request, db: AsyncSession = Depends(get_db_session)
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Query()],
+    ids: Optional[List[int]] = Depends(requested_ids),
+    db: AsyncSession = Depends(get_read_db_session),
+    session_factory: SessionFactory = Depends(get_read_db_session_factory),
 ) -> List[Author]:
-    logger.info("Fetching authors.")
-    result = await authors.read_authors(db)
+    if ids is not None:
+        logger.info(f"Fetching authors with ids: {ids}.")
+        result, missing = await authors.read_authors_by_ids(ids, db)
+        set_missing_ids(response, missing)
+        logger.info(f"Fetched authors: {result}")
+        return result
+
+    if wants_ndjson(request):
+        logger.info(f"Streaming authors after cursor: {page.after}.")
+        return ndjson_response(
+            session_factory, partial(authors.stream_authors, after=page.after_id)
+        )
+
+    logger.info(f"Fetching authors: {page}.")
+    if page.total:
+        set_total_count(response, await authors.count_authors(db))
+    result = await authors.read_authors(db, page.limit, page.after_id)
+    set_next_cursor(response, result, page.limit)
     logger.info(f"Fetched authors: {result}")
     return result
 
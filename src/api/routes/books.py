@@ -1,13 +1,41 @@
-from typing import List
+from functools import partial
+from typing import Annotated, List, Optional, Union
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from auth.dependencies import get_current_admin_user
+from config.constants import MAX_BULK_SIZE
+from core.batch import requested_ids, required_ids, set_missing_ids
+from core.coalescing import flag_writes
+from core.export import ExportFormat, export_response
+from core.importing import parse_records, upload_media_type
 from core.limiter import limiter
+from core.pagination import set_next_cursor, set_total_count
+from core.selection import requested_expansions, requested_fields, sparse_response
+from core.streaming import ndjson_response, wants_ndjson
 from crud import books
-from database.session import get_db_session
-from schemas import Book, BookCreate, BookUpdate
+from crud.loader import load_books
+from database.session import (
+    SessionFactory,
+    get_db_session,
+    get_db_session_factory,
+    get_read_db_session,
+    get_read_db_session_factory,
+)
+from schemas import (
+    Book,
+    BookCreate,
+    BookExpanded,
+    BookExpansion,
+    BookFlag,
+    BookListParams,
+    BookUpdate,
+    BulkResult,
+    ImportReport,
+)
 
 router = APIRouter(prefix="/books")
 
@@ -23,25 +51,148 @@ async def create_book(
     return result
 
 
-@router.get("/{id}", response_model=Book)
+@router.post("/bulk", response_model=List[BulkResult[Book]])
+@limiter.limit("10/second")
+async def create_books(
+    request: Request,
+    params: Annotated[List[BookCreate], Body(min_length=1, max_length=MAX_BULK_SIZE)],
+    db: AsyncSession = Depends(get_db_session),
+) -> List[BulkResult[Book]]:
+    logger.info(f"Creating {len(params)} books.")
+    result = await books.create_books(params, db)
+    logger.info(f"Created books: {result}.")
+    return result
+
+
+@router.post("/import", response_model=ImportReport)
+@limiter.limit("10/second")
+async def import_books(
+    request: Request, db: AsyncSession = Depends(get_db_session)
+) -> ImportReport:
+    media_type = upload_media_type(request)
+    logger.info(f"Importing books from {media_type} upload.")
+    result = await books.import_books(parse_records(request.stream(), media_type), db)
+    logger.info(f"Imported {result.imported} books, rejected {result.failed} rows.")
+    return result
+
+
+@router.post(
+    "/load",
+    response_model=ImportReport,
+    dependencies=[Depends(get_current_admin_user)],
+)
+@limiter.limit("10/second")
+async def load_books_from_upload(
+    request: Request, db: AsyncSession = Depends(get_db_session)
+) -> ImportReport:
+    media_type = upload_media_type(request)
+    logger.info(f"Bulk loading books from {media_type} upload.")
+    result = await load_books(parse_records(request.stream(), media_type), db)
+    logger.info(f"Loaded {result.imported} books, rejected {result.failed} rows.")
+    return result
+
+
+@router.get("/export", response_class=StreamingResponse)
+@limiter.limit("10/second")
+async def export_books(
+    request: Request,
+    export_format: ExportFormat = Query(ExportFormat.CSV, alias="format"),
+    session_factory: SessionFactory = Depends(get_read_db_session_factory),
+) -> StreamingResponse:
+    logger.info(f"Exporting books as {export_format.value}.")
+    return export_response(session_factory, books.stream_book_rows, export_format)
+
+
+@router.get("/{id}", response_model=Union[BookExpanded, Book])
 @limiter.limit("10/second")
 async def read_book(
-    request: Request, id: int, db: AsyncSession = Depends(get_db_session)
+    request: Request,
+    response: Response,
+    id: int,
+    expand: List[BookExpansion] = Depends(requested_expansions),
+    fields: Optional[List[str]] = Depends(requested_fields),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> Book:
     logger.info(f"Fetching book with id: {id}.")
-    result = await books.read_book(id, db)
+    result = await books.read_book(id, db, expand, fields)
     logger.info(f"Fetched book: {result}.")
+    if fields is not None:
+        return sparse_response(result, response)
     return result
 
 
-@router.get("/", response_model=List[Book])
+@router.get("/", response_model=List[Union[BookExpanded, Book]])
 @limiter.limit("10/second")
 async def read_books(
-    request: Request, db: AsyncSession = Depends(get_db_session)
+    request: Request,
+    response: Response,
+    page: Annotated[BookListParams, Query()],
+    ids: Optional[List[int]] = Depends(requested_ids),
+    expand: List[BookExpansion] = Depends(requested_expansions),
+    fields: Optional[List[str]] = Depends(requested_fields),
+    db: AsyncSession = Depends(get_read_db_session),
+    session_factory: SessionFactory = Depends(get_read_db_session_factory),
 ) -> List[Book]:
-    logger.info("Fetching books.")
-    result = await books.read_books(db)
+    if ids is not None:
+        logger.info(f"Fetching books with ids: {ids}.")
+        result, missing = await books.read_books_by_ids(ids, db, expand, fields)
+        set_missing_ids(response, missing)
+        logger.info(f"Fetched books: {result}")
+        if fields is not None:
+            return sparse_response(result, response)
+        return result
+
+    if wants_ndjson(request):
+        logger.info(f"Streaming books: {page}.")
+        return ndjson_response(
+            session_factory,
+            partial(
+                books.stream_books,
+                after=page.after_id,
+                filters=page,
+                after_value=page.after_value,
+                expand=expand,
+                fields=fields,
+            ),
+        )
+
+    logger.info(f"Fetching books: {page}.")
+    if page.total:
+        set_total_count(response, await books.count_books(page, db))
+    result = await books.read_books(
+        db, page.limit, page.after_id, page, page.after_value, expand, fields
+    )
+    set_next_cursor(response, result, page.limit, page.sort.key)
     logger.info(f"Fetched books: {result}")
+    if fields is not None:
+        return sparse_response(result, response)
+    return result
+
+
+@router.patch("/", response_model=List[BulkResult[int]])
+@limiter.limit("10/second")
+async def update_books(
+    request: Request,
+    params: BookUpdate,
+    ids: List[int] = Depends(required_ids),
+    db: AsyncSession = Depends(get_db_session),
+) -> List[BulkResult[int]]:
+    logger.info(f"Updating books with ids: {ids}.")
+    result = await books.update_books(ids, params, db)
+    logger.info(f"Updated books: {result}.")
+    return result
+
+
+@router.delete("/", response_model=List[BulkResult[int]])
+@limiter.limit("10/second")
+async def delete_books(
+    request: Request,
+    ids: List[int] = Depends(required_ids),
+    db: AsyncSession = Depends(get_db_session),
+) -> List[BulkResult[int]]:
+    logger.info(f"Deleting books with ids: {ids}.")
+    result = await books.delete_books(ids, db)
+    logger.info(f"Deleted books: {result}.")
     return result
 
 
@@ -59,6 +210,36 @@ async def update_book(
     return result
 
 
+@router.patch("/{id}/read", response_model=Book)
+@limiter.limit("10/second")
+async def mark_book_read(
+    request: Request,
+    id: int,
+    is_read: Annotated[bool, Body(embed=True)] = True,
+    session_factory: SessionFactory = Depends(get_db_session_factory),
+) -> Book:
+    logger.info(f"Setting is_read of book with id {id} to {is_read}.")
+    write = partial(books.write_book_flag, session_factory, id, BookFlag.READ)
+    result = await flag_writes.submit((id, BookFlag.READ), is_read, write)
+    logger.info(f"Updated book: {result}.")
+    return result
+
+
+@router.patch("/{id}/purchased", response_model=Book)
+@limiter.limit("10/second")
+async def mark_book_purchased(
+    request: Request,
+    id: int,
+    is_purchased: Annotated[bool, Body(embed=True)] = True,
+    session_factory: SessionFactory = Depends(get_db_session_factory),
+) -> Book:
+    logger.info(f"Setting is_purchased of book with id {id} to {is_purchased}.")
+    write = partial(books.write_book_flag, session_factory, id, BookFlag.PURCHASED)
+    result = await flag_writes.submit((id, BookFlag.PURCHASED), is_purchased, write)
+    logger.info(f"Updated book: {result}.")
+    return result
+
+
 @router.delete("/{id}", response_model=Book)
 @limiter.limit("10/second")
 async def delete_book(
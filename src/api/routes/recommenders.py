@@ -1,13 +1,23 @@
-from typing import List
+from functools import partial
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config.constants import MAX_BULK_SIZE, MAX_RESOLVE_SIZE
+from core.batch import requested_ids, set_missing_ids
 from core.limiter import limiter
+from core.pagination import PageParams, set_next_cursor, set_total_count
+from core.streaming import ndjson_response, wants_ndjson
 from crud import recommenders
-from database.session import get_db_session
-from schemas import Recommender, RecommenderCreate, RecommenderUpdate
+from database.session import (
+    SessionFactory,
+    get_db_session,
+    get_read_db_session,
+    get_read_db_session_factory,
+)
+from schemas import BulkResult, Recommender, RecommenderCreate, RecommenderUpdate
 
 router = APIRouter(prefix="/recommenders")
 
@@ -25,10 +35,38 @@ async def create_recommender(
     return result
 
 
+@router.post("/bulk", response_model=List[BulkResult[Recommender]])
+@limiter.limit("10/second")
+async def create_recommenders(
+    request: Request,
+    params: Annotated[
+        List[RecommenderCreate], Body(min_length=1, max_length=MAX_BULK_SIZE)
+    ],
+    db: AsyncSession = Depends(get_db_session),
+) -> List[BulkResult[Recommender]]:
+    logger.info(f"Creating {len(params)} recommenders.")
+    result = await recommenders.create_recommenders(params, db)
+    logger.info(f"Created recommenders: {result}.")
+    return result
+
+
+@router.post("/resolve", response_model=List[Recommender])
+@limiter.limit("10/second")
+async def resolve_recommenders(
+    request: Request,
+    names: Annotated[List[str], Body(min_length=1, max_length=MAX_RESOLVE_SIZE)],
+    db: AsyncSession = Depends(get_db_session),
+) -> List[Recommender]:
+    logger.info(f"Resolving {len(names)} recommender names.")
+    result = await recommenders.resolve_recommenders(names, db)
+    logger.info(f"Resolved {len(result)} recommender names.")
+    return result
+
+
 @router.get("/{id}", response_model=Recommender)
 @limiter.limit("10/second")
 async def read_recommender(
-    request: Request, id: int, db: AsyncSession = Depends(get_db_session)
+    request: Request, id: int, db: AsyncSession = Depends(get_read_db_session)
 ) -> Recommender:
     logger.info(f"Fetching recommender with id: {id}.")
     result = await recommenders.read_recommender(id, db)
@@ -39,10 +77,32 @@ async def read_recommender(
 @router.get("/", response_model=List[Recommender])
 @limiter.limit("10/second")
 async def read_recommenders(
-    request: Request, db: AsyncSession = Depends(get_db_session)
+    request: Request,
+    response: Response,
+    page: Annotated[PageParams, Query()],
+    ids: Optional[List[int]] = Depends(requested_ids),
+    db: AsyncSession = Depends(get_read_db_session),
+    session_factory: SessionFactory = Depends(get_read_db_session_factory),
 ) -> List[Recommender]:
-    logger.info("Fetching recommenders.")
-    result = await recommenders.read_recommenders(db)
+    if ids is not None:
+        logger.info(f"Fetching recommenders with ids: {ids}.")
+        result, missing = await recommenders.read_recommenders_by_ids(ids, db)
+        set_missing_ids(response, missing)
+        logger.info(f"Fetched recommenders: {result}")
+        return result
+
+    if wants_ndjson(request):
+        logger.info(f"Streaming recommenders after cursor: {page.after}.")
+        return ndjson_response(
+            session_factory,
+            partial(recommenders.stream_recommenders, after=page.after_id),
+        )
+
+    logger.info(f"Fetching recommenders: {page}.")
+    if page.total:
+        set_total_count(response, await recommenders.count_recommenders(db))
+    result = await recommenders.read_recommenders(db, page.limit, page.after_id)
+    set_next_cursor(response, result, page.limit)
     logger.info(f"Fetched recommenders: {result}")
     return result
 
@@ -4,8 +4,13 @@ from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.session import get_db_session
-from exceptions.exceptions import InvalidAccountError, InvalidTokenError
+from config.settings import settings
+from database.session import get_read_db_session, release_connection
+from exceptions.exceptions import (
+    InvalidAccountError,
+    InvalidTokenError,
+    PermissionDeniedError,
+)
 
 from .models import User
 from .services import get_user_by_username
@@ -16,7 +21,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ) -> User:
     """Fetch the user currently authenticate via an access token.
 
@@ -28,7 +33,8 @@ async def get_current_user(
         The token to verify and decode. Injected via `OAuth2PasswordBearer` scheme.
 
     session : AsyncSession
-        The asynchronous session used to query the user. Injected via `get_db_session`.
+        The asynchronous session used to query the user. Injected via
+        `get_read_db_session`, so authenticating never takes a write lock.
 
     Returns
     -------
@@ -42,6 +48,8 @@ async def get_current_user(
     """
     token_data = verify_token(token)
     db_user = await get_user_by_username(token_data.username, db)
+    # Don't hold a pooled connection for the rest of the request
+    await release_connection(db)
     if not db_user:
         raise InvalidTokenError("Invalid credentials.")
     return User.model_validate(db_user)
@@ -70,3 +78,28 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise InvalidAccountError("Account has been disabled or deactivated.")
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: User = Depends(get_current_active_user),
+) -> User:
+    """Return the authenticated user if they are listed in `admin_usernames`.
+
+    Parameters
+    ----------
+    current_user : User
+        The active user currently authenticated. Injected via `get_current_active_user`.
+
+    Returns
+    -------
+    User
+        A Pydantic model representing the authenticated admin.
+
+    Raises
+    ------
+    PermissionDeniedError
+        If the user is not an admin.
+    """
+    if current_user.username not in settings.admin_usernames:
+        raise PermissionDeniedError("Admin access required.")
+    return current_user
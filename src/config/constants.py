@@ -1,2 +1,17 @@
 API_PREFIX = "/api"
 VERSION = "0.1.0"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_CHUNK_SIZE = 1000
+MAX_BULK_SIZE = 1000
+MAX_RESOLVE_SIZE = 10_000
+IMPORT_CHUNK_SIZE = 1000
+MAX_IMPORT_ERRORS = 100
+MAX_IMPORT_LINE_LENGTH = 65_536
+MAX_NAME_LENGTH = 64
+MIN_YEAR_PUBLISHED = -9999
+MAX_YEAR_PUBLISHED = 9999
+MISSING_IDS_HEADER = "X-Missing-Ids"
+TOTAL_COUNT_HEADER = "X-Total-Count"
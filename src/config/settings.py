@@ -1,24 +1,67 @@
-from pydantic import SecretStr
+from typing import Dict, List, Optional
+
+from pydantic import SecretStr, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     project_name: str = "AklatanAPI"
     db_driver: str = "postgresql+asyncpg"
-    db_user: SecretStr
-    db_password: SecretStr
+    db_user: Optional[SecretStr] = None
+    db_password: Optional[SecretStr] = None
     db_host: str = "localhost"
     db_port: int = 5432
-    db_name: SecretStr
+    db_name: Optional[SecretStr] = None
+    db_sqlite_path: Optional[str] = None
+    sqlite_read_connections: int = 4
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_cache_size: int = -64_000
+    sqlite_busy_timeout_ms: int = 5_000
+    db_replica_urls: List[SecretStr] = []
+    db_replica_retry_seconds: float = 30.0
+    db_breaker_failure_threshold: int = 5
+    db_breaker_reset_seconds: float = 30.0
+    db_external_pooler: bool = False
+    db_external_pooler_pool_size: int = 0
     secret_key: SecretStr = SecretStr("unsafe-key")
     algorithm: SecretStr = SecretStr("HS256")
     access_token_expire_minutes: int = 30
+    admin_usernames: List[str] = []
     max_connections_count: int = 20
     min_connections_count: int = 1
+    pool_max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    pool_max_waiters: Optional[int] = None
+    retry_after_seconds: int = 1
+    statement_timeout_seconds: Optional[float] = None
+    max_statement_timeout_seconds: float = 3600.0
+    route_statement_timeouts: Dict[str, float] = {}
+    flag_write_coalesce_seconds: float = 0.0
+    count_cache_seconds: float = 60.0
+    count_cache_settle_seconds: float = 5.0
+    count_estimate_threshold: int = 100_000
     debug: bool = False
 
+    @model_validator(mode="after")
+    def check_db_credentials(self) -> "Settings":
+        if self.db_sqlite_path is None and None in (
+            self.db_user,
+            self.db_password,
+            self.db_name,
+        ):
+            raise ValueError(
+                "db_user, db_password and db_name are required unless "
+                "db_sqlite_path is set."
+            )
+        return self
+
     @property
     def database_url(self) -> SecretStr:
+        if self.db_sqlite_path is not None:
+            return SecretStr(f"sqlite+aiosqlite:///{self.db_sqlite_path}")
         return SecretStr(
             f"{self.db_driver}://{self.db_user.get_secret_value()}:{self.db_password.get_secret_value()}@{self.db_host}:{self.db_port}/{self.db_name.get_secret_value()}"
         )
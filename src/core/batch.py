@@ -0,0 +1,39 @@
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+
+from config.constants import MAX_PAGE_SIZE, MISSING_IDS_HEADER
+
+
+def requested_ids(
+    ids: Optional[str] = Query(
+        None,
+        pattern=r"^\d+(,\d+)*$",
+        description=f"Comma-separated ids to fetch, at most {MAX_PAGE_SIZE}.",
+    ),
+) -> Optional[List[int]]:
+    """Parse the `ids` query parameter, dropping repeats but keeping the order."""
+    if ids is None:
+        return None
+    parsed = list(dict.fromkeys(int(id) for id in ids.split(",")))
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {MAX_PAGE_SIZE} ids can be fetched at once.",
+        )
+    return parsed
+
+
+def required_ids(
+    ids: str = Query(
+        ...,
+        pattern=r"^\d+(,\d+)*$",
+        description=f"Comma-separated ids to act on, at most {MAX_PAGE_SIZE}.",
+    ),
+) -> List[int]:
+    return requested_ids(ids)
+
+
+def set_missing_ids(response: Response, missing: Sequence[int]) -> None:
+    if missing:
+        response.headers[MISSING_IDS_HEADER] = ",".join(map(str, missing))
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from config.settings import settings
+
+
+class PendingWrite:
+    def __init__(self, value: Any, write: Callable[[Any], Awaitable[Any]]):
+        self.value = value
+        self.write = write
+        self.task: Optional[asyncio.Task] = None
+        # Set to end the window early
+        self.due = asyncio.Event()
+
+
+class WriteCoalescer:
+    """Merge writes to the same key that arrive within a short window.
+
+    The first write for a key waits `window` seconds before running. Writes
+    for the same key arriving in the meantime only replace the value, so the
+    window ends with a single write of the latest value, whose result every
+    caller gets. The write runs in a task of its own and goes through even if
+    the caller that started it disconnects. A window of zero writes through.
+    Call `drain` before shutting down, so that pending writes are not lost.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pending: Dict[Hashable, PendingWrite] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self, key: Hashable, value: Any, write: Callable[[Any], Awaitable[Any]]
+    ) -> Any:
+        if self.window <= 0:
+            return await write(value)
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = PendingWrite(value, write)
+            self._pending[key] = pending
+            pending.task = asyncio.create_task(self._flush(key, pending))
+            self._tasks.add(pending.task)
+            pending.task.add_done_callback(self._forget)
+        else:
+            pending.value = value
+        return await asyncio.shield(pending.task)
+
+    async def drain(self) -> None:
+        """Run every pending write now and wait for all of them to finish."""
+        for pending in self._pending.values():
+            pending.due.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _flush(self, key: Hashable, pending: PendingWrite) -> Any:
+        try:
+            await asyncio.wait_for(pending.due.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._pending[key]
+        return await pending.write(pending.value)
+
+    def _forget(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        # Keep errors that no remaining caller waited for out of the logs
+        if not task.cancelled():
+            task.exception()
+
+
+flag_writes = WriteCoalescer(settings.flag_write_coalesce_seconds)
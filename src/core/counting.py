@@ -0,0 +1,95 @@
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from config.settings import settings
+
+# Key of `Session.info` listing the tables written in the current transaction
+WRITTEN_TABLES = "written_tables"
+
+
+class CountCache:
+    """Exact row counts, kept per process until their table is written to.
+
+    Commits of sessions in this process invalidate the counts of the tables
+    they wrote to. Writes made by other processes go unnoticed, so counts
+    also expire after `ttl` seconds.
+
+    Counts are usually read from a replica, which may not have replayed the
+    commit that invalidated them yet, or may have been started before it.
+    So for `settle` seconds after a table is invalidated, counts of that
+    table are not cached.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        settle: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.settle = settle
+        self._clock = clock
+        self._counts: Dict[Tuple[str, Hashable], Tuple[int, float]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+
+    def get(self, table: str, key: Hashable = ()) -> Optional[int]:
+        entry = self._counts.get((table, key))
+        if entry is None:
+            return None
+        count, counted_at = entry
+        if self._clock() - counted_at >= self.ttl:
+            del self._counts[(table, key)]
+            return None
+        return count
+
+    def set(self, table: str, key: Hashable, count: int) -> None:
+        now = self._clock()
+        invalidated_at = self._invalidated_at.get(table)
+        if invalidated_at is not None and now - invalidated_at < self.settle:
+            return
+        self._counts[(table, key)] = (count, now)
+
+    def invalidate(self, table: str) -> None:
+        self._invalidated_at[table] = self._clock()
+        for entry in [entry for entry in self._counts if entry[0] == table]:
+            del self._counts[entry]
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._invalidated_at.clear()
+
+
+count_cache = CountCache(
+    settings.count_cache_seconds, settings.count_cache_settle_seconds
+)
+
+
+def mark_written(session: Session, *tables: str) -> None:
+    """Record writes that the listeners below cannot see, such as raw SQL."""
+    session.info.setdefault(WRITTEN_TABLES, set()).update(tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def track_statement_writes(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        mark_written(state.session, state.statement.table.name)
+
+
+@event.listens_for(Session, "after_flush")
+def track_flushed_writes(session: Session, flush_context: Any) -> None:
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        mark_written(session, instance.__table__.name)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_written_tables(session: Session) -> None:
+    for table in session.info.pop(WRITTEN_TABLES, ()):
+        count_cache.invalidate(table)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_written_tables(session: Session) -> None:
+    session.info.pop(WRITTEN_TABLES, None)
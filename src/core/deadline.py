@@ -0,0 +1,89 @@
+import asyncio
+import math
+from typing import Optional
+
+from fastapi import Request
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.settings import settings
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+
+def request_deadline(request: Request) -> Optional[float]:
+    """Return how many seconds the request's queries may run, if bounded.
+
+    The route's configured timeout (or the default) may be tightened, but
+    never extended, by the client through the `X-Request-Timeout` header.
+    Bounded timeouts never exceed `max_statement_timeout_seconds`.
+    """
+    route = request.scope.get("route")
+    timeout = settings.route_statement_timeouts.get(
+        getattr(route, "name", ""), settings.statement_timeout_seconds
+    )
+    try:
+        requested = float(request.headers.get(DEADLINE_HEADER, "nan"))
+    except ValueError:
+        requested = float("nan")
+    if math.isfinite(requested) and requested > 0:
+        if timeout is None or requested < timeout:
+            timeout = requested
+    if timeout is not None:
+        timeout = min(timeout, settings.max_statement_timeout_seconds)
+    return timeout
+
+
+class CancelOnDisconnectMiddleware:
+    """Cancel the request handler as soon as the client disconnects.
+
+    Cancellation reaches the awaiting database driver, which for asyncpg sends
+    a cancel request to the server, so abandoned queries stop running.
+    Servers also report a disconnect once the response has been sent, which
+    is passed on to the app instead, so dependency teardown and background
+    tasks still run to completion.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Size 1 so request bodies are still pulled at the handler's pace
+        messages: asyncio.Queue[Message] = asyncio.Queue(maxsize=1)
+        handler = asyncio.current_task()
+        disconnected = False
+        response_sent = False
+
+        async def send_tracking_completion(message: Message) -> None:
+            nonlocal response_sent
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                response_sent = True
+
+        async def watch_disconnect() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect" and not response_sent:
+                    disconnected = True
+                    logger.info(f"Client disconnected from {scope['path']}.")
+                    handler.cancel()
+                    return
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await self.app(scope, messages.get, send_tracking_completion)
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+        finally:
+            watcher.cancel()
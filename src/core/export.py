@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Callable, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from database.session import SessionFactory
+
+from .importing import CSV_MEDIA_TYPE
+from .streaming import NDJSON_MEDIA_TYPE
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = (
+    "id",
+    "title",
+    "author",
+    "recommender",
+    "year_published",
+    "is_purchased",
+    "is_read",
+)
+
+Rows = Sequence[Sequence]
+RowStream = Callable[[AsyncSession], AsyncIterator[Rows]]
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: CSV_MEDIA_TYPE,
+    ExportFormat.JSONL: NDJSON_MEDIA_TYPE,
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out whatever was written since the last drain."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def encode_csv(chunks: AsyncIterator[Rows]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    async for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def encode_jsonl(chunks: AsyncIterator[Rows]) -> AsyncIterator[str]:
+    async for chunk in chunks:
+        yield "".join(
+            f"{json.dumps(dict(zip(EXPORT_COLUMNS, row)))}\n" for row in chunk
+        )
+
+
+def _arrow_schema():
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("title", pa.string()),
+            ("author", pa.string()),
+            ("recommender", pa.string()),
+            ("year_published", pa.int32()),
+            ("is_purchased", pa.bool_()),
+            ("is_read", pa.bool_()),
+        ]
+    )
+
+
+async def encode_columnar(
+    chunks: AsyncIterator[Rows], export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Encode chunks as Arrow record batches, in Parquet or the Arrow IPC stream format.
+
+    Each chunk becomes one record batch (a row group in Parquet). Encoding runs
+    in the threadpool so it does not hold up the event loop.
+    """
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    if export_format is ExportFormat.PARQUET:
+        writer = pq.ParquetWriter(sink, schema)
+
+        def write(batch) -> None:
+            writer.write_table(pa.Table.from_batches([batch], schema=schema))
+
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    async for chunk in chunks:
+        columns = list(zip(*chunk))
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array(column, type=field.type)
+                for column, field in zip(columns, schema)
+            ],
+            schema=schema,
+        )
+        await run_in_threadpool(write, batch)
+        yield sink.drain()
+    await run_in_threadpool(writer.close)
+    yield sink.drain()
+
+
+def export_response(
+    session_factory: SessionFactory, stream: RowStream, export_format: ExportFormat
+) -> StreamingResponse:
+    """Stream rows as a downloadable file in `export_format`.
+
+    As with `ndjson_response`, the session is opened by the response body, so
+    rows are read from the database only as fast as the client takes them.
+    """
+    columnar = export_format in (ExportFormat.PARQUET, ExportFormat.ARROW)
+    if columnar and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Exporting {export_format.value} requires pyarrow.",
+        )
+
+    async def body() -> AsyncIterator:
+        async with session_factory() as session:
+            chunks = stream(session)
+            if columnar:
+                encoded = encode_columnar(chunks, export_format)
+            elif export_format is ExportFormat.CSV:
+                encoded = encode_csv(chunks)
+            else:
+                encoded = encode_jsonl(chunks)
+            async for data in encoded:
+                if data:
+                    yield data
+
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="books.{export_format.value}"'
+        },
+    )
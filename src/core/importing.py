@@ -0,0 +1,120 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+
+from config.constants import MAX_IMPORT_LINE_LENGTH
+from schemas import ImportRow
+
+from .streaming import NDJSON_MEDIA_TYPE
+
+CSV_MEDIA_TYPE = "text/csv"
+IMPORT_MEDIA_TYPES = (CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+# Line number of a record, with either the parsed row or why it was rejected
+ParsedRecord = Tuple[int, Union[ImportRow, str]]
+
+
+def upload_media_type(request: Request) -> str:
+    """Return the media type of an import upload, rejecting unsupported ones."""
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in IMPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload must be one of: {', '.join(IMPORT_MEDIA_TYPES)}.",
+        )
+    return media_type
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split a byte stream into numbered lines, holding at most one line in memory.
+
+    Raises `ValueError` for a line longer than `MAX_IMPORT_LINE_LENGTH`.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    number = 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            number += 1
+            yield number, line.rstrip("\r")
+        if len(pending) > MAX_IMPORT_LINE_LENGTH:
+            raise ValueError(f"Line {number + 1} is too long.")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield number + 1, pending.rstrip("\r")
+
+
+def validate_row(number: int, values: Dict[str, object]) -> ParsedRecord:
+    try:
+        return number, ImportRow.model_validate(values)
+    except ValidationError as exc:
+        return number, "; ".join(
+            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+            for error in exc.errors()
+        )
+
+
+async def parse_ndjson(
+    lines: AsyncIterator[Tuple[int, str]],
+) -> AsyncIterator[ParsedRecord]:
+    async for number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError:
+            yield number, "Invalid JSON."
+            continue
+        if not isinstance(values, dict):
+            yield number, "Expected a JSON object."
+            continue
+        yield validate_row(number, values)
+
+
+async def parse_csv(
+    lines: AsyncIterator[Tuple[int, str]],
+) -> AsyncIterator[ParsedRecord]:
+    """Parse CSV with a header row, allowing quoted values to span lines."""
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    first = 0
+    async for number, line in lines:
+        if not record:
+            first = number
+        record.append(line)
+        text = "\n".join(record)
+        # A record is complete once its quotes are balanced
+        if text.count('"') % 2:
+            if len(text) > MAX_IMPORT_LINE_LENGTH:
+                raise ValueError(f"Record on line {first} is too long.")
+            continue
+        record = []
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield first, f"Expected {len(header)} columns, got {len(values)}."
+            continue
+        # Empty cells leave optional columns unset
+        yield validate_row(
+            first, {name: value for name, value in zip(header, values) if value != ""}
+        )
+    if record:
+        yield first, "Unterminated quoted value."
+
+
+def parse_records(
+    chunks: AsyncIterator[bytes], media_type: str
+) -> AsyncIterator[ParsedRecord]:
+    if media_type == CSV_MEDIA_TYPE:
+        return parse_csv(read_lines(chunks))
+    return parse_ndjson(read_lines(chunks))
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import Response
+from pydantic import BaseModel, Field, field_validator
+
+from config.constants import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the keyset values of the last row of a page into an opaque cursor."""
+    payload = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Decode an opaque cursor back into its keyset values.
+
+    Raises `ValueError` if the cursor was not produced by `encode_cursor`.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid pagination cursor.")
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid pagination cursor.")
+    return values
+
+
+class PageParams(BaseModel):
+    """Query parameters for keyset pagination in primary key order."""
+
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    after: Optional[str] = None
+    total: bool = False
+
+    @field_validator("after")
+    @classmethod
+    def validate_after(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            last_id = decode_cursor(value)[-1]
+            if not isinstance(last_id, int) or isinstance(last_id, bool):
+                raise ValueError("Invalid pagination cursor.")
+        return value
+
+    @property
+    def after_id(self) -> Optional[int]:
+        if self.after is None:
+            return None
+        return decode_cursor(self.after)[-1]
+
+
+def set_next_cursor(
+    response: Response, items: Sequence[Any], limit: int, sort_key: str = "id"
+) -> None:
+    """Advertise the cursor of the next page if the current page is full.
+
+    Pages ordered by anything other than the id carry the sort key of the last
+    row in front of its id, which breaks ties between equal sort keys.
+    """
+    if len(items) == limit:
+        last = items[-1]
+        values = [last.id] if sort_key == "id" else [getattr(last, sort_key), last.id]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(values)
+
+
+def set_total_count(response: Response, count: int) -> None:
+    response.headers[TOTAL_COUNT_HEADER] = str(count)
@@ -0,0 +1,69 @@
+from typing import List, Optional, Sequence, Union
+
+from fastapi import Depends, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from schemas import Book, BookExpansion
+
+
+def split_choices(value: str, choices: Sequence[str], parameter: str) -> List[str]:
+    """Split a comma-separated query parameter, dropping repeats but keeping the order.
+
+    Raises a 422 if any entry is not one of `choices`.
+    """
+    parsed = list(dict.fromkeys(part.strip() for part in value.split(",")))
+    unknown = [part for part in parsed if part not in choices]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                f"Unknown {parameter}: {', '.join(unknown)}. "
+                f"Expected any of: {', '.join(choices)}."
+            ),
+        )
+    return parsed
+
+
+def requested_expansions(
+    expand: Optional[str] = Query(
+        None,
+        description="Comma-separated related rows to embed: author, recommender.",
+    ),
+) -> List[BookExpansion]:
+    if expand is None:
+        return []
+    choices = [expansion.value for expansion in BookExpansion]
+    return [BookExpansion(part) for part in split_choices(expand, choices, "expand")]
+
+
+def requested_fields(
+    fields: Optional[str] = Query(
+        None,
+        description=(
+            "Comma-separated book fields to return. The id is always included, "
+            "and so is the sort key when listing books."
+        ),
+    ),
+    expand: List[BookExpansion] = Depends(requested_expansions),
+) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    if expand:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="fields and expand cannot be combined.",
+        )
+    return split_choices(fields, list(Book.model_fields), "fields")
+
+
+def sparse_response(
+    content: Union[BaseModel, Sequence[BaseModel]], response: Response
+) -> JSONResponse:
+    """Send partial books as they are, since they do not fit the full response model.
+
+    Headers already set on the route's `response`, such as the next page
+    cursor, are carried over.
+    """
+    return JSONResponse(jsonable_encoder(content), headers=dict(response.headers))
@@ -0,0 +1,32 @@
+from typing import AsyncIterator, Callable, Sequence
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.session import SessionFactory
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    session_factory: SessionFactory,
+    stream: Callable[[AsyncSession], AsyncIterator[Sequence[BaseModel]]],
+) -> StreamingResponse:
+    """Stream chunks of models as newline-delimited JSON.
+
+    The session is opened by the response body itself, so it stays open for as
+    long as rows are being sent instead of closing with the request dependencies.
+    """
+
+    async def body() -> AsyncIterator[str]:
+        async with session_factory() as session:
+            async for chunk in stream(session):
+                yield "".join(f"{item.model_dump_json()}\n" for item in chunk)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
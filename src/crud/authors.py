@@ -1,26 +1,69 @@
 import sqlite3
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
+from config.constants import STREAM_CHUNK_SIZE
+from crud.common import count_rows, dialect_insert, get_or_create_by_name
+from database.session import release_connection
 from exceptions.exceptions import EntityAlreadyExistsError, EntityDoesNotExistError
-from schemas import Author, AuthorCreate, AuthorUpdate
+from schemas import Author, AuthorCreate, AuthorUpdate, BulkResult, BulkStatus
 
 
 async def create_author(params: AuthorCreate, session: AsyncSession) -> Author:
-    db_author = models.Author(**params.model_dump())
-    session.add(db_author)
+    stmt = insert(models.Author).values(**params.model_dump()).returning(models.Author)
     try:
+        db_author = await session.scalar(stmt)
         await session.commit()
-        await session.refresh(db_author)
     except (IntegrityError, sqlite3.IntegrityError):
         raise EntityAlreadyExistsError("Author already exists.")
     return Author.model_validate(db_author)
 
 
+async def create_authors(
+    params: List[AuthorCreate], session: AsyncSession
+) -> List[BulkResult[Author]]:
+    stmt = (
+        dialect_insert(session, models.Author)
+        .on_conflict_do_nothing(index_elements=[models.Author.name])
+        .returning(models.Author)
+    )
+    db_authors = (await session.scalars(stmt, [p.model_dump() for p in params])).all()
+    await session.commit()
+
+    created = {db_author.name: db_author for db_author in db_authors}
+    results: List[BulkResult[Author]] = []
+    for index, p in enumerate(params):
+        # Only the first of several items with the same name is created
+        db_author = created.pop(p.name, None)
+        if db_author is None:
+            results.append(
+                BulkResult(
+                    index=index,
+                    status=BulkStatus.CONFLICT,
+                    detail="Author already exists.",
+                )
+            )
+        else:
+            results.append(
+                BulkResult(
+                    index=index,
+                    status=BulkStatus.CREATED,
+                    item=Author.model_validate(db_author),
+                )
+            )
+    return results
+
+
+async def resolve_authors(names: List[str], session: AsyncSession) -> List[Author]:
+    ids = await get_or_create_by_name(session, models.Author, names)
+    await session.commit()
+    return [Author(id=ids[name], name=name) for name in names]
+
+
 async def find_author(id: int, session: AsyncSession) -> models.Author:
     db_author = await session.get(models.Author, id)
     if not db_author:
@@ -28,37 +71,88 @@ async def find_author(id: int, session: AsyncSession) -> models.Author:
     return db_author
 
 
-async def find_authors(session: AsyncSession) -> List[models.Author]:
+async def find_authors(
+    session: AsyncSession, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[models.Author]:
     stmt = select(models.Author).order_by(models.Author.id)
+    if after is not None:
+        stmt = stmt.where(models.Author.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
     db_authors = (await session.scalars(stmt)).all()
     return db_authors
 
 
+async def stream_authors(
+    session: AsyncSession, after: Optional[int] = None
+) -> AsyncIterator[List[Author]]:
+    stmt = (
+        select(models.Author)
+        .order_by(models.Author.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    if after is not None:
+        stmt = stmt.where(models.Author.id > after)
+    db_authors = await session.stream_scalars(stmt)
+    async for partition in db_authors.partitions():
+        yield [Author.model_validate(db_author) for db_author in partition]
+
+
 async def read_author(id: int, session: AsyncSession) -> Author:
     db_author = await find_author(id, session)
+    await release_connection(session)
     return Author.model_validate(db_author)
 
 
-async def read_authors(session: AsyncSession) -> List[Author]:
-    db_authors = await find_authors(session)
+async def read_authors(
+    session: AsyncSession, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[Author]:
+    db_authors = await find_authors(session, limit, after)
+    await release_connection(session)
     return [Author.model_validate(db_author) for db_author in db_authors]
 
 
+async def count_authors(session: AsyncSession) -> int:
+    return await count_rows(
+        session, select(models.Author.id), models.Author.__tablename__
+    )
+
+
+async def read_authors_by_ids(
+    ids: List[int], session: AsyncSession
+) -> Tuple[List[Author], List[int]]:
+    """Return the authors with the given ids in the same order, and the missing ids."""
+    stmt = select(models.Author).where(models.Author.id.in_(ids))
+    found = {db_author.id: db_author for db_author in await session.scalars(stmt)}
+    await release_connection(session)
+    return (
+        [Author.model_validate(found[id]) for id in ids if id in found],
+        [id for id in ids if id not in found],
+    )
+
+
 async def update_author(id: int, params: AuthorUpdate, session: AsyncSession) -> Author:
-    db_author = await find_author(id, session)
-    for attr, value in params.model_dump(exclude_unset=True).items():
-        setattr(db_author, attr, value)
-    session.add(db_author)
+    stmt = (
+        update(models.Author)
+        .where(models.Author.id == id)
+        .values(**params.model_dump(exclude_unset=True))
+        .returning(models.Author)
+        .execution_options(populate_existing=True)
+    )
     try:
+        db_author = await session.scalar(stmt)
+        if db_author is None:
+            raise EntityDoesNotExistError(f"Author with id {id} does not exist.")
         await session.commit()
-        await session.refresh(db_author)
     except (IntegrityError, sqlite3.IntegrityError):
         raise EntityAlreadyExistsError("Author with this name already exists.")
     return Author.model_validate(db_author)
 
 
 async def delete_author(id: int, session: AsyncSession) -> Author:
-    db_author = await find_author(id, session)
-    await session.delete(db_author)
+    stmt = delete(models.Author).where(models.Author.id == id).returning(models.Author)
+    db_author = await session.scalar(stmt)
+    if db_author is None:
+        raise EntityDoesNotExistError(f"Author with id {id} does not exist.")
     await session.commit()
     return Author.model_validate(db_author)
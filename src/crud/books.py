@@ -1,77 +1,626 @@
-from typing import List
+from typing import (
+    Any,
+    AsyncIterator,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import (
+    Exists,
+    Row,
+    Select,
+    delete,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 import models
+from config.constants import IMPORT_CHUNK_SIZE, STREAM_CHUNK_SIZE
+from core.importing import ParsedRecord
+from crud.common import count_rows, get_or_create_by_name
+from database.session import SessionFactory, release_connection
 from exceptions.exceptions import EntityDoesNotExistError
-from schemas import Book, BookCreate, BookUpdate
+from schemas import (
+    Author,
+    Book,
+    BookCreate,
+    BookExpanded,
+    BookExpansion,
+    BookFilters,
+    BookFlag,
+    BookUpdate,
+    BulkResult,
+    BulkStatus,
+    ImportReport,
+    ImportRow,
+    Recommender,
+    partial_book,
+)
+
+# Subclasses such as `BookListParams` carry pagination fields as well
+FILTER_FIELDS = set(BookFilters.model_fields) - {"sort"}
+
+# Foreign keys of a book and the rows they reference
+BOOK_REFERENCES = {"author_id": models.Author, "recommender_id": models.Recommender}
+
+
+def references_exist(values: Dict[str, Any]) -> List[Exists]:
+    """Conditions that hold when every row referenced in `values` exists.
+
+    Book writes are guarded with these, so a bad reference leaves the write
+    with no rows instead of costing extra lookups up front. SQLite does not
+    always enforce foreign keys, so the constraint alone is not enough.
+    """
+    return [
+        select(model.id).where(model.id == values[key]).exists()
+        for key, model in BOOK_REFERENCES.items()
+        if key in values
+    ]
+
+
+async def find_missing_reference(
+    values: Dict[str, Any], session: AsyncSession
+) -> Optional[str]:
+    for key, model in BOOK_REFERENCES.items():
+        if key in values and await session.get(model, values[key]) is None:
+            return f"{model.__name__} with id {values[key]} does not exist."
+    return None
+
+
+async def missing_reference(
+    values: Dict[str, Any], session: AsyncSession, id: Optional[int] = None
+) -> EntityDoesNotExistError:
+    """Find out which row a guarded book write did not find.
+
+    Only called once a write has affected no rows, so these lookups never
+    slow down a successful write.
+    """
+    if id is not None and await session.get(models.Book, id) is None:
+        return EntityDoesNotExistError(f"Book with id {id} does not exist.")
+    detail = await find_missing_reference(values, session)
+    return EntityDoesNotExistError(
+        detail or "Book references a row that does not exist."
+    )
 
 
 async def create_book(params: BookCreate, session: AsyncSession) -> Book:
-    db_book = models.Book(**params.model_dump())
-    session.add(db_book)
+    values = params.model_dump()
+    columns = models.Book.__table__.c
+    row = select(
+        *(literal(value, columns[key].type).label(key) for key, value in values.items())
+    ).where(*references_exist(values))
+    stmt = insert(models.Book).from_select(list(values), row).returning(models.Book)
+    try:
+        db_book = await session.scalar(stmt)
+    except IntegrityError:
+        # A referenced row may have been deleted between the check and the insert
+        await session.rollback()
+        detail = await find_missing_reference(values, session)
+        if detail is None:
+            raise
+        raise EntityDoesNotExistError(detail)
+    if db_book is None:
+        raise await missing_reference(values, session)
     await session.commit()
-    await session.refresh(db_book)
     return Book.model_validate(db_book)
 
 
-async def find_book(id: int, session: AsyncSession) -> models.Book:
-    db_book = await session.get(models.Book, id)
+async def _valid_references(
+    params: List[BookCreate],
+    indexes: Sequence[int],
+    results: List[Optional[BulkResult[Book]]],
+    session: AsyncSession,
+) -> List[int]:
+    """Return the indexes of the books whose author and recommender exist.
+
+    The other books are reported as invalid in `results`.
+    """
+    author_ids = {params[index].author_id for index in indexes}
+    recommender_ids = {params[index].recommender_id for index in indexes}
+    known_authors = set(
+        await session.scalars(
+            select(models.Author.id).where(models.Author.id.in_(author_ids))
+        )
+    )
+    known_recommenders = set(
+        await session.scalars(
+            select(models.Recommender.id).where(
+                models.Recommender.id.in_(recommender_ids)
+            )
+        )
+    )
+
+    valid: List[int] = []
+    for index in indexes:
+        p = params[index]
+        if p.author_id not in known_authors:
+            detail = f"Author with id {p.author_id} does not exist."
+        elif p.recommender_id not in known_recommenders:
+            detail = f"Recommender with id {p.recommender_id} does not exist."
+        else:
+            valid.append(index)
+            continue
+        results[index] = BulkResult(
+            index=index, status=BulkStatus.INVALID, detail=detail
+        )
+    return valid
+
+
+async def create_books(
+    params: List[BookCreate], session: AsyncSession
+) -> List[BulkResult[Book]]:
+    results: List[Optional[BulkResult[Book]]] = [None] * len(params)
+    valid = await _valid_references(params, range(len(params)), results, session)
+
+    while valid:
+        stmt = insert(models.Book).returning(models.Book, sort_by_parameter_order=True)
+        try:
+            db_books = list(
+                await session.scalars(
+                    stmt, [params[index].model_dump() for index in valid]
+                )
+            )
+        except IntegrityError:
+            # A referenced row was deleted between the check and the insert, so
+            # check again and retry without the books that lost their reference
+            await session.rollback()
+            still_valid = await _valid_references(params, valid, results, session)
+            if len(still_valid) == len(valid):
+                raise
+            valid = still_valid
+            continue
+        for index, db_book in zip(valid, db_books):
+            results[index] = BulkResult(
+                index=index,
+                status=BulkStatus.CREATED,
+                item=Book.model_validate(db_book),
+            )
+        break
+    await session.commit()
+    return results
+
+
+async def _import_chunk(rows: List[ImportRow], session: AsyncSession) -> None:
+    author_ids = await get_or_create_by_name(
+        session, models.Author, (row.author for row in rows)
+    )
+    recommender_ids = await get_or_create_by_name(
+        session, models.Recommender, (row.recommender for row in rows)
+    )
+    await session.execute(
+        insert(models.Book),
+        [
+            dict(
+                author_id=author_ids[row.author],
+                recommender_id=recommender_ids[row.recommender],
+                title=row.title,
+                year_published=row.year_published,
+                is_purchased=row.is_purchased,
+                is_read=row.is_read,
+            )
+            for row in rows
+        ],
+    )
+    await session.commit()
+
+
+async def import_books(
+    records: AsyncIterator[ParsedRecord], session: AsyncSession
+) -> ImportReport:
+    """Insert parsed rows in chunks, each committed in its own transaction.
+
+    Authors and recommenders are matched by name and created when missing.
+    Rejected rows are counted, but only the first few of them are reported,
+    so memory stays bounded however large the upload is.
+    """
+    report = ImportReport()
+    rows: List[ImportRow] = []
+    try:
+        async for line, row in records:
+            if isinstance(row, str):
+                report.reject(line, row)
+                continue
+            rows.append(row)
+            if len(rows) == IMPORT_CHUNK_SIZE:
+                await _import_chunk(rows, session)
+                report.imported += len(rows)
+                rows = []
+    except ValueError as exc:
+        # The upload cannot be parsed any further, but earlier chunks stay
+        report.reject(0, str(exc))
+    if rows:
+        await _import_chunk(rows, session)
+        report.imported += len(rows)
+    return report
+
+
+def expansion_options(expand: Collection[BookExpansion]) -> List[Any]:
+    """Loader options that join the related rows named in `expand`.
+
+    Every book has an author and a recommender, so inner joins are safe.
+    """
+    return [
+        joinedload(getattr(models.Book, expansion.value), innerjoin=True)
+        for expansion in expand
+    ]
+
+
+def book_columns(fields: Sequence[str], sort_key: str = "id") -> Tuple[str, ...]:
+    """Put the id and the sort key, which pages are keyed on, before `fields`.
+
+    `fields` are put in the order of `Book`'s fields, however the client
+    listed them, so every subset maps to a single cached partial model.
+    """
+    wanted = set(fields)
+    ordered = [name for name in Book.model_fields if name in wanted]
+    return tuple(dict.fromkeys(["id", sort_key, *ordered]))
+
+
+def to_partial_books(rows: Sequence[Row], columns: Tuple[str, ...]) -> List[BaseModel]:
+    model = partial_book(columns)
+    return [model.model_validate(row._asdict()) for row in rows]
+
+
+def with_expansions(stmt: Select, expand: Collection[BookExpansion]) -> Select:
+    # Books already in the session are reloaded so the relationships get joined
+    if not expand:
+        return stmt
+    return stmt.options(*expansion_options(expand)).execution_options(
+        populate_existing=True
+    )
+
+
+def to_book(db_book: models.Book, expand: Collection[BookExpansion] = ()) -> Book:
+    book = Book.model_validate(db_book)
+    if not expand:
+        return book
+    return BookExpanded(
+        **book.model_dump(),
+        author=(
+            Author.model_validate(db_book.author)
+            if BookExpansion.AUTHOR in expand
+            else None
+        ),
+        recommender=(
+            Recommender.model_validate(db_book.recommender)
+            if BookExpansion.RECOMMENDER in expand
+            else None
+        ),
+    )
+
+
+async def find_book(
+    id: int, session: AsyncSession, expand: Collection[BookExpansion] = ()
+) -> models.Book:
+    db_book = await session.get(
+        models.Book,
+        id,
+        options=expansion_options(expand),
+        populate_existing=bool(expand),
+    )
     if not db_book:
         raise EntityDoesNotExistError(f"Book with id {id} does not exist.")
     return db_book
 
 
-async def find_books(session: AsyncSession) -> List[models.Book]:
-    stmt = select(models.Book).order_by(models.Book.id)
+def select_books(
+    filters: Optional[BookFilters] = None,
+    after: Optional[int] = None,
+    after_value: Any = None,
+    expand: Collection[BookExpansion] = (),
+    fields: Optional[Sequence[str]] = None,
+) -> Select:
+    """Build a filtered, keyset-paginated select of books.
+
+    Rows are ordered by the sort key and then by id, so paging stays stable
+    when several books share a title or a year. `after_value` is the sort key
+    of the last row of the previous page and is ignored when sorting by id.
+    Given `fields`, only those columns are selected instead of whole books.
+    """
+    filters = filters or BookFilters()
+    if fields is None:
+        stmt = select(models.Book)
+    else:
+        stmt = select(*(getattr(models.Book, name) for name in fields))
+
+    for name, value in filters.model_dump(
+        include=FILTER_FIELDS, exclude_none=True
+    ).items():
+        column = getattr(models.Book, name)
+        if value is False:
+            # Flags left unset on creation are stored as NULL, meaning false
+            stmt = stmt.where(or_(column.is_(False), column.is_(None)))
+        else:
+            stmt = stmt.where(column == value)
+
+    if filters.sort.key == "id":
+        keys, bounds = [models.Book.id], [after]
+    else:
+        sort_column = getattr(models.Book, filters.sort.key)
+        keys, bounds = [sort_column, models.Book.id], [after_value, after]
+    if filters.sort.descending:
+        stmt = stmt.order_by(*(key.desc() for key in keys))
+    else:
+        stmt = stmt.order_by(*keys)
+
+    if after is not None:
+        position = tuple_(*keys)
+        bound = tuple_(*bounds)
+        stmt = stmt.where(
+            position < bound if filters.sort.descending else position > bound
+        )
+    return with_expansions(stmt, expand)
+
+
+async def find_books(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    filters: Optional[BookFilters] = None,
+    after_value: Any = None,
+    expand: Collection[BookExpansion] = (),
+) -> List[models.Book]:
+    stmt = select_books(filters, after, after_value, expand)
+    if limit is not None:
+        stmt = stmt.limit(limit)
     db_books = (await session.scalars(stmt)).all()
     return db_books
 
 
-async def read_book(id: int, session: AsyncSession) -> Book:
-    db_book = await find_book(id, session)
-    return Book.model_validate(db_book)
+async def stream_books(
+    session: AsyncSession,
+    after: Optional[int] = None,
+    filters: Optional[BookFilters] = None,
+    after_value: Any = None,
+    expand: Collection[BookExpansion] = (),
+    fields: Optional[Sequence[str]] = None,
+) -> AsyncIterator[List[BaseModel]]:
+    if fields is not None:
+        columns = book_columns(fields, (filters or BookFilters()).sort.key)
+        stmt = select_books(filters, after, after_value, fields=columns)
+        rows = await session.stream(stmt.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        async for partition in rows.partitions():
+            yield to_partial_books(partition, columns)
+        return
 
+    stmt = select_books(filters, after, after_value, expand).execution_options(
+        yield_per=STREAM_CHUNK_SIZE
+    )
+    db_books = await session.stream_scalars(stmt)
+    async for partition in db_books.partitions():
+        yield [to_book(db_book, expand) for db_book in partition]
 
-async def read_books(session: AsyncSession) -> List[Book]:
-    db_books = await find_books(session)
-    return [Book.model_validate(db_book) for db_book in db_books]
 
+async def stream_book_rows(session: AsyncSession) -> AsyncIterator[Sequence[Row]]:
+    """Yield chunks of books joined with their author and recommender names."""
+    stmt = (
+        select(
+            models.Book.id,
+            models.Book.title,
+            models.Author.name.label("author"),
+            models.Recommender.name.label("recommender"),
+            models.Book.year_published,
+            models.Book.is_purchased,
+            models.Book.is_read,
+        )
+        .join(models.Author, models.Book.author_id == models.Author.id)
+        .join(models.Recommender, models.Book.recommender_id == models.Recommender.id)
+        .order_by(models.Book.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    result = await session.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
 
-async def update_book(id: int, params: BookUpdate, session: AsyncSession) -> Book:
-    db_book = await find_book(id, session)
 
-    update_data = params.model_dump(exclude_unset=True)
+async def read_book(
+    id: int,
+    session: AsyncSession,
+    expand: Collection[BookExpansion] = (),
+    fields: Optional[Sequence[str]] = None,
+) -> BaseModel:
+    if fields is not None:
+        columns = book_columns(fields)
+        stmt = select_books(fields=columns).where(models.Book.id == id)
+        row = (await session.execute(stmt)).first()
+        await release_connection(session)
+        if row is None:
+            raise EntityDoesNotExistError(f"Book with id {id} does not exist.")
+        return to_partial_books([row], columns)[0]
+
+    db_book = await find_book(id, session, expand)
+    await release_connection(session)
+    return to_book(db_book, expand)
+
+
+async def read_books(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    filters: Optional[BookFilters] = None,
+    after_value: Any = None,
+    expand: Collection[BookExpansion] = (),
+    fields: Optional[Sequence[str]] = None,
+) -> List[BaseModel]:
+    if fields is not None:
+        columns = book_columns(fields, (filters or BookFilters()).sort.key)
+        stmt = select_books(filters, after, after_value, fields=columns)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        rows = (await session.execute(stmt)).all()
+        await release_connection(session)
+        return to_partial_books(rows, columns)
+
+    db_books = await find_books(session, limit, after, filters, after_value, expand)
+    await release_connection(session)
+    return [to_book(db_book, expand) for db_book in db_books]
 
-    # Validate author id if provided
-    if "author_id" in update_data:
-        author = await session.get(models.Author, update_data["author_id"])
-        if not author:
-            raise EntityDoesNotExistError(
-                f"Author with id {update_data['author_id']} does not exist."
-            )
 
-    # Validate recommender id if provided
-    if "recommender_id" in update_data:
-        recommender = await session.get(
-            models.Recommender, update_data["recommender_id"]
+async def count_books(filters: Optional[BookFilters], session: AsyncSession) -> int:
+    filters = filters or BookFilters()
+    key = tuple(
+        sorted(filters.model_dump(include=FILTER_FIELDS, exclude_none=True).items())
+    )
+    stmt = select_books(filters, fields=["id"])
+    return await count_rows(session, stmt, models.Book.__tablename__, key)
+
+
+async def read_books_by_ids(
+    ids: List[int],
+    session: AsyncSession,
+    expand: Collection[BookExpansion] = (),
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[List[BaseModel], List[int]]:
+    """Return the books with the given ids in the same order, and the missing ids."""
+    if fields is not None:
+        columns = book_columns(fields)
+        stmt = select_books(fields=columns).where(models.Book.id.in_(ids))
+        rows = {row.id: row for row in await session.execute(stmt)}
+        await release_connection(session)
+        return (
+            to_partial_books([rows[id] for id in ids if id in rows], columns),
+            [id for id in ids if id not in rows],
         )
-        if not recommender:
-            raise EntityDoesNotExistError(
-                f"Recommender with id {update_data['recommender_id']} does not exist."
+
+    stmt = with_expansions(select(models.Book).where(models.Book.id.in_(ids)), expand)
+    found = {db_book.id: db_book for db_book in await session.scalars(stmt)}
+    await release_connection(session)
+    return (
+        [to_book(found[id], expand) for id in ids if id in found],
+        [id for id in ids if id not in found],
+    )
+
+
+async def update_book(id: int, params: BookUpdate, session: AsyncSession) -> Book:
+    update_data = params.model_dump(exclude_unset=True)
+    if not update_data:
+        return await read_book(id, session)
+
+    stmt = (
+        update(models.Book)
+        .where(models.Book.id == id, *references_exist(update_data))
+        .values(**update_data)
+        .returning(models.Book)
+        .execution_options(populate_existing=True)
+    )
+    try:
+        db_book = await session.scalar(stmt)
+    except IntegrityError:
+        # A referenced row may have been deleted between the check and the update
+        await session.rollback()
+        detail = await find_missing_reference(update_data, session)
+        if detail is None:
+            raise
+        raise EntityDoesNotExistError(detail)
+    if db_book is None:
+        raise await missing_reference(update_data, session, id)
+    await session.commit()
+    return Book.model_validate(db_book)
+
+
+def bulk_outcomes(
+    ids: List[int], affected: Set[int], status: BulkStatus
+) -> List[BulkResult[int]]:
+    return [
+        (
+            BulkResult(index=index, status=status, item=id)
+            if id in affected
+            else BulkResult(
+                index=index,
+                status=BulkStatus.NOT_FOUND,
+                item=id,
+                detail=f"Book with id {id} does not exist.",
             )
+        )
+        for index, id in enumerate(ids)
+    ]
+
+
+async def update_books(
+    ids: List[int], params: BookUpdate, session: AsyncSession
+) -> List[BulkResult[int]]:
+    """Apply one patch to many books in a single UPDATE, reporting on every id."""
+    update_data = params.model_dump(exclude_unset=True)
+    if not update_data:
+        stmt = select(models.Book.id).where(models.Book.id.in_(ids))
+        found = set(await session.scalars(stmt))
+        await release_connection(session)
+        return bulk_outcomes(ids, found, BulkStatus.UPDATED)
 
-    for attr, value in update_data.items():
-        setattr(db_book, attr, value)
-    session.add(db_book)
+    stmt = (
+        update(models.Book)
+        .where(models.Book.id.in_(ids), *references_exist(update_data))
+        .values(**update_data)
+        .returning(models.Book.id)
+    )
+    try:
+        updated = set(await session.scalars(stmt))
+    except IntegrityError:
+        # A referenced row may have been deleted between the check and the update
+        await session.rollback()
+        detail = await find_missing_reference(update_data, session)
+        if detail is None:
+            raise
+        raise EntityDoesNotExistError(detail)
+    if not updated:
+        # Either none of the books exist, or the patch references a missing row
+        detail = await find_missing_reference(update_data, session)
+        if detail is not None:
+            raise EntityDoesNotExistError(detail)
+    await session.commit()
+    return bulk_outcomes(ids, updated, BulkStatus.UPDATED)
+
+
+async def delete_books(ids: List[int], session: AsyncSession) -> List[BulkResult[int]]:
+    """Delete many books in a single DELETE, reporting on every id."""
+    stmt = delete(models.Book).where(models.Book.id.in_(ids)).returning(models.Book.id)
+    deleted = set(await session.scalars(stmt))
+    await session.commit()
+    return bulk_outcomes(ids, deleted, BulkStatus.DELETED)
+
+
+async def set_book_flag(
+    id: int, flag: BookFlag, value: bool, session: AsyncSession
+) -> Book:
+    stmt = (
+        update(models.Book)
+        .where(models.Book.id == id)
+        .values({flag.value: value})
+        .returning(models.Book)
+        .execution_options(populate_existing=True)
+    )
+    db_book = await session.scalar(stmt)
+    if db_book is None:
+        raise EntityDoesNotExistError(f"Book with id {id} does not exist.")
     await session.commit()
-    await session.refresh(db_book)
     return Book.model_validate(db_book)
 
 
+async def write_book_flag(
+    session_factory: SessionFactory, id: int, flag: BookFlag, value: bool
+) -> Book:
+    """Set a flag in a session of its own, which a coalesced write outlives."""
+    async with session_factory() as session:
+        return await set_book_flag(id, flag, value, session)
+
+
 async def delete_book(id: int, session: AsyncSession) -> Book:
-    db_book = await find_book(id, session)
-    await session.delete(db_book)
+    stmt = delete(models.Book).where(models.Book.id == id).returning(models.Book)
+    db_book = await session.scalar(stmt)
+    if db_book is None:
+        raise EntityDoesNotExistError(f"Book with id {id} does not exist.")
     await session.commit()
     return Book.model_validate(db_book)
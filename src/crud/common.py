@@ -0,0 +1,116 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Type
+
+from sqlalchemy import Select, String, bindparam, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import settings
+from core.counting import count_cache, mark_written
+from models import Base
+
+# Stays well below SQLite's limit on bound parameters per statement
+SQLITE_CHUNK_SIZE = 500
+
+
+def dialect_insert(session: AsyncSession, model: Type[Base]):
+    """Return an INSERT for `model` that supports `ON CONFLICT` on the session's dialect."""
+    if session.bind is not None and session.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def chunked(items: Sequence, size: int) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def get_or_create_by_name(
+    session: AsyncSession, model: Type[Base], names: Iterable[str]
+) -> Dict[str, int]:
+    """Return the id of every name in `model`'s table, inserting missing names.
+
+    On PostgreSQL all names travel as one array parameter. A single statement
+    inserts the missing ones and selects the rest. SQLite has no arrays, so
+    names are sent in chunks, and each chunk is one upsert returning every row.
+    Does not commit.
+    """
+    table = model.__table__
+    unique_names: List[str] = list(dict.fromkeys(names))
+    if not unique_names:
+        return {}
+
+    ids: Dict[str, int] = {}
+    if session.bind is not None and session.bind.dialect.name == "postgresql":
+        wanted = select(
+            func.unnest(
+                bindparam("names", unique_names, type_=postgresql.ARRAY(String))
+            ).label("name")
+        ).cte("wanted")
+        inserted = (
+            postgresql.insert(table)
+            .from_select(["name"], select(wanted.c.name))
+            .on_conflict_do_nothing(index_elements=["name"])
+            .returning(table.c.id, table.c.name)
+            .cte("inserted")
+        )
+        stmt = select(inserted.c.id, inserted.c.name).union_all(
+            select(table.c.id, table.c.name).join(wanted, table.c.name == wanted.c.name)
+        )
+        ids.update((name, id) for id, name in await session.execute(stmt))
+        # The insert hides in a CTE of a SELECT, which the write tracking
+        # listeners do not recognise as a write
+        mark_written(session.sync_session, table.name)
+
+        # Rows committed by a concurrent insert after this statement's snapshot
+        # are neither inserted nor visible, so look those up again
+        missing = [name for name in unique_names if name not in ids]
+        if missing:
+            stmt = select(table.c.id, table.c.name).where(table.c.name.in_(missing))
+            ids.update((name, id) for id, name in await session.execute(stmt))
+        return ids
+
+    for chunk in chunked(unique_names, SQLITE_CHUNK_SIZE):
+        insert = sqlite.insert(table).values([{"name": name} for name in chunk])
+        # A no-op update makes RETURNING include the rows that already existed
+        stmt = insert.on_conflict_do_update(
+            index_elements=["name"], set_={"name": insert.excluded.name}
+        ).returning(table.c.id, table.c.name)
+        ids.update((name, id) for id, name in await session.execute(stmt))
+    return ids
+
+
+async def estimate_rows(session: AsyncSession, table: str) -> Optional[int]:
+    """Return the planner's estimate of the rows in `table`, if there is one."""
+    if session.bind is None or session.bind.dialect.name != "postgresql":
+        return None
+    estimate = await session.scalar(
+        text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    )
+    # Tables that were never vacuumed or analyzed have no estimate (-1)
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def count_rows(
+    session: AsyncSession, stmt: Select, table: str, key: Hashable = ()
+) -> int:
+    """Count the rows `stmt` selects from `table`, served from the count cache.
+
+    `key` tells apart the filters applied by `stmt`, and is empty for none.
+    Unfiltered counts of tables the planner estimates to hold at least
+    `count_estimate_threshold` rows return that estimate instead.
+    """
+    count = count_cache.get(table, key)
+    if count is not None:
+        return count
+    if key == ():
+        estimate = await estimate_rows(session, table)
+        if estimate is not None and estimate >= settings.count_estimate_threshold:
+            return estimate
+    count = await session.scalar(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    )
+    count_cache.set(table, key, count)
+    return count
@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+import asyncpg
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.counting import mark_written
+from core.importing import CSV_MEDIA_TYPE, ParsedRecord, parse_records
+from core.streaming import NDJSON_MEDIA_TYPE
+from database.session import sessionmanager
+from exceptions.exceptions import ServiceError
+from schemas import ImportReport
+
+from .books import import_books
+
+STAGING_TABLE = "staging_books"
+STAGING_COLUMNS = (
+    "title",
+    "author",
+    "recommender",
+    "year_published",
+    "is_purchased",
+    "is_read",
+)
+FILE_CHUNK_SIZE = 65_536
+
+StagedRow = Tuple[str, str, str, int, Optional[bool], Optional[bool]]
+
+
+async def _staged_rows(
+    records: AsyncIterator[ParsedRecord], report: ImportReport
+) -> AsyncIterator[StagedRow]:
+    try:
+        async for line, row in records:
+            if isinstance(row, str):
+                report.reject(line, row)
+                continue
+            yield (
+                row.title,
+                row.author,
+                row.recommender,
+                row.year_published,
+                row.is_purchased,
+                row.is_read,
+            )
+    except ValueError as exc:
+        # The upload cannot be parsed any further, load what was read so far
+        report.reject(0, str(exc))
+
+
+async def _copy_books(
+    records: AsyncIterator[ParsedRecord], session: AsyncSession
+) -> ImportReport:
+    report = ImportReport()
+    # Creating the staging table also opens the transaction COPY then runs in
+    await session.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} ("
+            "title text NOT NULL, author text NOT NULL, recommender text NOT NULL, "
+            "year_published integer NOT NULL, is_purchased boolean, is_read boolean"
+            ") ON COMMIT DROP"
+        )
+    )
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    try:
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE,
+            records=_staged_rows(records, report),
+            columns=STAGING_COLUMNS,
+        )
+    except (asyncpg.PostgresError, asyncpg.InterfaceError):
+        # The driver is used directly here, so SQLAlchemy does not wrap its errors
+        logger.error("Failed to copy books into the staging table.")
+        raise ServiceError
+
+    for table, column in (
+        ("dim_authors", "author"),
+        ("dim_recommenders", "recommender"),
+    ):
+        await session.execute(
+            text(
+                f"INSERT INTO {table} (name) "
+                f"SELECT DISTINCT {column} FROM {STAGING_TABLE} "
+                "ON CONFLICT (name) DO NOTHING"
+            )
+        )
+    result = await session.execute(
+        text(
+            "INSERT INTO fct_books "
+            "(author_id, recommender_id, title, year_published, is_purchased, is_read) "
+            "SELECT a.id, r.id, s.title, s.year_published, "
+            "coalesce(s.is_purchased, false), coalesce(s.is_read, false) "
+            f"FROM {STAGING_TABLE} s "
+            "JOIN dim_authors a ON a.name = s.author "
+            "JOIN dim_recommenders r ON r.name = s.recommender"
+        )
+    )
+    # Raw SQL is not seen by the count cache, so record what was written
+    mark_written(session.sync_session, "dim_authors", "dim_recommenders", "fct_books")
+    await session.commit()
+    report.imported = result.rowcount
+    return report
+
+
+async def load_books(
+    records: AsyncIterator[ParsedRecord], session: AsyncSession
+) -> ImportReport:
+    """Load a large number of books as fast as the database allows.
+
+    On PostgreSQL, rows are streamed with `COPY` into a temporary staging table,
+    then merged into the authors, recommenders and books tables in the same
+    transaction, so either the whole load lands or none of it. Other databases
+    fall back to the chunked import.
+    """
+    if session.bind is not None and session.bind.dialect.name == "postgresql":
+        return await _copy_books(records, session)
+    return await import_books(records, session)
+
+
+async def read_file(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as file:
+        while chunk := file.read(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+async def main(path: Path, media_type: str) -> None:
+    """Load the file at `path`, writing the import report to stdout as JSON."""
+    try:
+        async with sessionmanager.session() as session:
+            report = await load_books(
+                parse_records(read_file(path), media_type), session
+            )
+    finally:
+        await sessionmanager.close()
+    logger.info(f"Loaded {report.imported} books, rejected {report.failed} rows.")
+    sys.stdout.write(report.model_dump_json(indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load books from a file.")
+    parser.add_argument("path", type=Path, help="CSV or JSON Lines file to load.")
+    parser.add_argument(
+        "--format",
+        choices=("csv", "jsonl"),
+        help="File format. Guessed from the file extension if omitted.",
+    )
+    args = parser.parse_args()
+    file_format = args.format or ("csv" if args.path.suffix == ".csv" else "jsonl")
+    asyncio.run(
+        main(args.path, CSV_MEDIA_TYPE if file_format == "csv" else NDJSON_MEDIA_TYPE)
+    )
@@ -1,28 +1,87 @@
 import sqlite3
-from typing import List
+from typing import AsyncIterator, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
+from config.constants import STREAM_CHUNK_SIZE
+from crud.common import count_rows, dialect_insert, get_or_create_by_name
+from database.session import release_connection
 from exceptions.exceptions import EntityAlreadyExistsError, EntityDoesNotExistError
-from schemas import Recommender, RecommenderCreate, RecommenderUpdate
+from schemas import (
+    BulkResult,
+    BulkStatus,
+    Recommender,
+    RecommenderCreate,
+    RecommenderUpdate,
+)
 
 
 async def create_recommender(
     params: RecommenderCreate, session: AsyncSession
 ) -> Recommender:
-    db_recommender = models.Recommender(**params.model_dump())
-    session.add(db_recommender)
+    stmt = (
+        insert(models.Recommender)
+        .values(**params.model_dump())
+        .returning(models.Recommender)
+    )
     try:
+        db_recommender = await session.scalar(stmt)
         await session.commit()
-        await session.refresh(db_recommender)
     except (IntegrityError, sqlite3.IntegrityError):
         raise EntityAlreadyExistsError("Recommender already exists.")
     return Recommender.model_validate(db_recommender)
 
 
+async def create_recommenders(
+    params: List[RecommenderCreate], session: AsyncSession
+) -> List[BulkResult[Recommender]]:
+    stmt = (
+        dialect_insert(session, models.Recommender)
+        .on_conflict_do_nothing(index_elements=[models.Recommender.name])
+        .returning(models.Recommender)
+    )
+    db_recommenders = (
+        await session.scalars(stmt, [p.model_dump() for p in params])
+    ).all()
+    await session.commit()
+
+    created = {
+        db_recommender.name: db_recommender for db_recommender in db_recommenders
+    }
+    results: List[BulkResult[Recommender]] = []
+    for index, p in enumerate(params):
+        # Only the first of several items with the same name is created
+        db_recommender = created.pop(p.name, None)
+        if db_recommender is None:
+            results.append(
+                BulkResult(
+                    index=index,
+                    status=BulkStatus.CONFLICT,
+                    detail="Recommender already exists.",
+                )
+            )
+        else:
+            results.append(
+                BulkResult(
+                    index=index,
+                    status=BulkStatus.CREATED,
+                    item=Recommender.model_validate(db_recommender),
+                )
+            )
+    return results
+
+
+async def resolve_recommenders(
+    names: List[str], session: AsyncSession
+) -> List[Recommender]:
+    ids = await get_or_create_by_name(session, models.Recommender, names)
+    await session.commit()
+    return [Recommender(id=ids[name], name=name) for name in names]
+
+
 async def find_recommender(id: int, session: AsyncSession) -> models.Recommender:
     db_recommender = await session.get(models.Recommender, id)
     if not db_recommender:
@@ -30,41 +89,101 @@ async def find_recommender(id: int, session: AsyncSession) -> models.Recommender
     return db_recommender
 
 
-async def find_recommenders(session: AsyncSession) -> List[models.Recommender]:
+async def find_recommenders(
+    session: AsyncSession, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[models.Recommender]:
     stmt = select(models.Recommender).order_by(models.Recommender.id)
+    if after is not None:
+        stmt = stmt.where(models.Recommender.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
     db_recommenders = (await session.scalars(stmt)).all()
     return db_recommenders
 
 
+async def stream_recommenders(
+    session: AsyncSession, after: Optional[int] = None
+) -> AsyncIterator[List[Recommender]]:
+    stmt = (
+        select(models.Recommender)
+        .order_by(models.Recommender.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    if after is not None:
+        stmt = stmt.where(models.Recommender.id > after)
+    db_recommenders = await session.stream_scalars(stmt)
+    async for partition in db_recommenders.partitions():
+        yield [
+            Recommender.model_validate(db_recommender) for db_recommender in partition
+        ]
+
+
 async def read_recommender(id: int, session: AsyncSession) -> Recommender:
     db_recommender = await find_recommender(id, session)
+    await release_connection(session)
     return Recommender.model_validate(db_recommender)
 
 
-async def read_recommenders(session: AsyncSession) -> List[Recommender]:
-    db_recommenders = await find_recommenders(session)
+async def read_recommenders(
+    session: AsyncSession, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[Recommender]:
+    db_recommenders = await find_recommenders(session, limit, after)
+    await release_connection(session)
     return [
         Recommender.model_validate(db_recommender) for db_recommender in db_recommenders
     ]
 
 
+async def count_recommenders(session: AsyncSession) -> int:
+    return await count_rows(
+        session, select(models.Recommender.id), models.Recommender.__tablename__
+    )
+
+
+async def read_recommenders_by_ids(
+    ids: List[int], session: AsyncSession
+) -> Tuple[List[Recommender], List[int]]:
+    """Return the recommenders with the given ids in the same order, and the missing ids."""
+    stmt = select(models.Recommender).where(models.Recommender.id.in_(ids))
+    found = {
+        db_recommender.id: db_recommender
+        for db_recommender in await session.scalars(stmt)
+    }
+    await release_connection(session)
+    return (
+        [Recommender.model_validate(found[id]) for id in ids if id in found],
+        [id for id in ids if id not in found],
+    )
+
+
 async def update_recommender(
     id: int, params: RecommenderUpdate, session: AsyncSession
 ) -> Recommender:
-    db_recommender = await find_recommender(id, session)
-    for attr, value in params.model_dump(exclude_unset=True).items():
-        setattr(db_recommender, attr, value)
-    session.add(db_recommender)
+    stmt = (
+        update(models.Recommender)
+        .where(models.Recommender.id == id)
+        .values(**params.model_dump(exclude_unset=True))
+        .returning(models.Recommender)
+        .execution_options(populate_existing=True)
+    )
     try:
+        db_recommender = await session.scalar(stmt)
+        if db_recommender is None:
+            raise EntityDoesNotExistError(f"Recommender with id {id} does not exist.")
         await session.commit()
-        await session.refresh(db_recommender)
     except (IntegrityError, sqlite3.IntegrityError):
         raise EntityAlreadyExistsError("Recommender with this name already exists.")
     return Recommender.model_validate(db_recommender)
 
 
 async def delete_recommender(id: int, session: AsyncSession) -> Recommender:
-    db_recommender = await find_recommender(id, session)
-    await session.delete(db_recommender)
+    stmt = (
+        delete(models.Recommender)
+        .where(models.Recommender.id == id)
+        .returning(models.Recommender)
+    )
+    db_recommender = await session.scalar(stmt)
+    if db_recommender is None:
+        raise EntityDoesNotExistError(f"Recommender with id {id} does not exist.")
     await session.commit()
     return Recommender.model_validate(db_recommender)
@@ -0,0 +1,78 @@
+import time
+from enum import Enum
+from typing import Callable
+
+from loguru import logger
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Stop sending work to a database that keeps failing.
+
+    The circuit opens after `failure_threshold` consecutive failures. While it
+    is open, callers are refused without touching the database. Once
+    `reset_timeout` seconds have passed, a single caller is let through as a
+    probe, and everyone else is still refused until the probe reports back:
+    success closes the circuit, failure opens it for another `reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return whether the caller may use the database.
+
+        The caller that moves an open circuit to half-open is the probe, and
+        must report its outcome through `record_success` or `record_failure`.
+        """
+        if self._state is CircuitState.CLOSED:
+            return True
+        if (
+            self._state is CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            logger.info(f"Probing {self.name} after {self.reset_timeout} seconds.")
+            self._state = CircuitState.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state is not CircuitState.CLOSED:
+            logger.info(f"{self.name} recovered, closing circuit.")
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if (
+            self._state is CircuitState.HALF_OPEN
+            or self._failures >= self.failure_threshold
+        ):
+            if self._state is not CircuitState.OPEN:
+                logger.warning(
+                    f"{self.name} is unavailable, failing fast for "
+                    f"{self.reset_timeout} seconds."
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
@@ -0,0 +1,185 @@
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Sequence
+
+from loguru import logger
+from sqlalchemy import (
+    Column,
+    Connection,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    delete,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+import auth.models  # type: ignore # noqa
+from config.settings import Settings, settings
+from exceptions.exceptions import ServiceError
+from models import Base, Book
+
+from .session import DatabaseSessionManager, sessionmanager
+
+# Arbitrary key for the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_KEY = 7_351_028
+
+schema_version = Table(
+    "schema_version", MetaData(), Column("version", Integer, nullable=False)
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A numbered schema change.
+
+    `upgrade` runs synchronously on a connection. Migrations that cannot run
+    inside a transaction, such as `CREATE INDEX CONCURRENTLY`, set
+    `transactional=False` and then run in autocommit mode.
+    Migrations should be idempotent, because the baseline builds a fresh
+    database from the current models.
+    """
+
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+    transactional: bool = True
+
+
+def create_index_concurrently(
+    connection: Connection, name: str, table: str, columns: Sequence[str]
+) -> None:
+    """Create an index if it is missing, without locking out writes on PostgreSQL.
+
+    Must be used from a migration with `transactional=False`.
+    """
+    concurrently = "CONCURRENTLY " if connection.dialect.name == "postgresql" else ""
+    connection.exec_driver_sql(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {name} "
+        f"ON {table} ({', '.join(columns)})"
+    )
+
+
+def create_base_tables(connection: Connection) -> None:
+    Base.metadata.create_all(connection)
+
+
+# Indexes for filtering and paging through books, as declared on `models.Book`
+BOOK_INDEXES = {
+    index.name: [column.name for column in index.columns]
+    for index in Book.__table_args__
+    if isinstance(index, Index)
+}
+
+
+def index_books(connection: Connection) -> None:
+    for name, columns in BOOK_INDEXES.items():
+        create_index_concurrently(connection, name, "fct_books", columns)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Create base tables", create_base_tables),
+    Migration(2, "Index books for filtering and sorting", index_books, False),
+]
+
+
+def latest_version() -> int:
+    return MIGRATIONS[-1].version
+
+
+async def get_schema_version(engine: AsyncEngine) -> int:
+    """Return the stored schema version, or 0 if none has been recorded yet."""
+    async with engine.connect() as connection:
+        try:
+            version = await connection.scalar(select(schema_version.c.version))
+        except (OperationalError, ProgrammingError):
+            return 0
+    return version or 0
+
+
+async def set_schema_version(connection: AsyncConnection, version: int) -> None:
+    await connection.execute(delete(schema_version))
+    await connection.execute(insert(schema_version).values(version=version))
+
+
+@asynccontextmanager
+async def migration_lock(
+    engine: AsyncEngine, external_pooler: bool = False
+) -> AsyncIterator[None]:
+    """Keep concurrently starting workers from migrating at the same time.
+
+    The advisory lock belongs to the server connection that took it. Behind a
+    transaction-pooling proxy, the unlock may run on another server connection
+    and leave the lock held forever, so migrating through one is refused.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    if external_pooler:
+        logger.error("Refusing to migrate through an external connection pooler.")
+        raise ServiceError(
+            "Migrations are pending. Run them against the database directly, "
+            "with db_external_pooler disabled, before starting the app."
+        )
+
+    async with engine.connect() as connection:
+        await connection.execution_options(isolation_level="AUTOCOMMIT")
+        lock = {"key": MIGRATION_LOCK_KEY}
+        await connection.execute(text("SELECT pg_advisory_lock(:key)"), lock)
+        try:
+            yield
+        finally:
+            await connection.execute(text("SELECT pg_advisory_unlock(:key)"), lock)
+
+
+async def apply_migration(engine: AsyncEngine, migration: Migration) -> None:
+    logger.info(f"Applying migration {migration.version}: {migration.description}.")
+    if migration.transactional:
+        async with engine.begin() as connection:
+            await connection.run_sync(migration.upgrade)
+            await set_schema_version(connection, migration.version)
+    else:
+        async with engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            await connection.run_sync(migration.upgrade)
+            await set_schema_version(connection, migration.version)
+
+
+async def run_migrations(
+    sessionmanager: DatabaseSessionManager, config: Settings = settings
+) -> None:
+    """Bring the schema up to date, with no DDL at all if it already is."""
+    engine = sessionmanager.engine
+    if engine is None:
+        logger.error("Tried to migrate but engine is not initiated.")
+        raise ServiceError
+
+    if await get_schema_version(engine) >= latest_version():
+        logger.info("Database schema is up to date.")
+        return
+
+    async with migration_lock(engine, config.db_external_pooler):
+        async with engine.begin() as connection:
+            await connection.run_sync(schema_version.create, checkfirst=True)
+        # Another worker may have migrated while this one waited for the lock
+        version = await get_schema_version(engine)
+        for migration in MIGRATIONS:
+            if migration.version > version:
+                await apply_migration(engine, migration)
+    logger.info(f"Database schema migrated to version {latest_version()}.")
+
+
+async def main() -> None:
+    try:
+        await run_migrations(sessionmanager)
+    finally:
+        await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
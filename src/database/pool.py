@@ -0,0 +1,50 @@
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+
+class PoolQueueFullError(PoolTimeoutError):
+    """Too many callers are already waiting for a pooled connection."""
+
+    pass
+
+
+class BoundedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that caps how many checkouts may wait for a connection.
+
+    Once every connection (including overflow) is checked out, up to
+    `max_waiters` callers queue for at most `pool_timeout` seconds. Anyone past
+    that is rejected immediately with `PoolQueueFullError`.
+    """
+
+    def __init__(self, creator, max_waiters: int = 0, **kw):
+        super().__init__(creator, **kw)
+        self._max_waiters = max_waiters
+        self._waiters = 0
+
+    def _is_saturated(self) -> bool:
+        return (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self._pool.empty()
+        )
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        if not self._is_saturated():
+            return super()._do_get()
+        if self._waiters >= self._max_waiters:
+            raise PoolQueueFullError(
+                f"Connection pool wait queue is full ({self._waiters} waiting)."
+            )
+        self._waiters += 1
+        try:
+            return super()._do_get()
+        finally:
+            self._waiters -= 1
+
+    def recreate(self) -> "BoundedQueuePool":
+        pool = super().recreate()
+        pool._max_waiters = self._max_waiters
+        return pool
+
+    def waiters(self) -> int:
+        return self._waiters
@@ -1,8 +1,22 @@
+import asyncio
+import itertools
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from functools import partial
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+)
+from uuid import uuid4
 
+from fastapi import Request
 from loguru import logger
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import Connection, event, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncEngine,
@@ -10,32 +24,157 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.pool import ConnectionPoolEntry, NullPool, QueuePool
+
+from config.settings import Settings, settings
+from core.deadline import request_deadline
+from exceptions.exceptions import (
+    DeadlineExceededError,
+    ServiceError,
+    ServiceUnavailableError,
+)
 
-from config.settings import settings
-from exceptions.exceptions import ServiceError
+from .breaker import CircuitBreaker, CircuitState
+from .pool import BoundedQueuePool
 
 DATABASE_URL = settings.database_url
-MAX_CONNECTIONS_COUNT = settings.max_connections_count
+REPLICA_URLS = settings.db_replica_urls
+REPLICA_RETRY_SECONDS = settings.db_replica_retry_seconds
+BREAKER_FAILURE_THRESHOLD = settings.db_breaker_failure_threshold
+BREAKER_RESET_SECONDS = settings.db_breaker_reset_seconds
+MIN_CONNECTIONS_COUNT = settings.min_connections_count
+
+SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
+
+# SQLSTATE raised by PostgreSQL when statement_timeout cancels a query
+QUERY_CANCELED = "57014"
+
+# Largest statement_timeout PostgreSQL accepts, in milliseconds
+MAX_STATEMENT_TIMEOUT_MS = 2_147_483_647
 
 
 class DatabaseSessionManager:
-    def __init__(self, host: str, **engine_kwargs):
+    def __init__(
+        self,
+        host: str,
+        replica_hosts: Sequence[str] = (),
+        replica_retry_seconds: float = REPLICA_RETRY_SECONDS,
+        replica_engine_kwargs: Optional[dict] = None,
+        breaker_failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        breaker_reset_seconds: float = BREAKER_RESET_SECONDS,
+        **engine_kwargs,
+    ):
         try:
             self.engine: AsyncEngine | None = create_async_engine(host, **engine_kwargs)
             self._sessionmaker: async_sessionmaker[AsyncSession] | None = (
                 async_sessionmaker(bind=self.engine, expire_on_commit=False)
             )
+            self.replica_engines: List[AsyncEngine] = [
+                create_async_engine(
+                    replica_host,
+                    **(
+                        engine_kwargs
+                        if replica_engine_kwargs is None
+                        else replica_engine_kwargs
+                    ),
+                )
+                for replica_host in replica_hosts
+            ]
+            self._replica_sessionmakers: List[async_sessionmaker[AsyncSession]] = [
+                async_sessionmaker(bind=replica_engine, expire_on_commit=False)
+                for replica_engine in self.replica_engines
+            ]
         except SQLAlchemyError:
             logger.error("Failed to initialize database engine.")
             raise ServiceError
 
+        self._breaker = CircuitBreaker(
+            "Database",
+            failure_threshold=breaker_failure_threshold,
+            reset_timeout=breaker_reset_seconds,
+        )
+        # Reads can fall back to the primary, so a replica is dropped from
+        # rotation after its first failure
+        self._replica_breakers: List[CircuitBreaker] = [
+            CircuitBreaker(
+                f"Replica {index}",
+                failure_threshold=1,
+                reset_timeout=replica_retry_seconds,
+            )
+            for index in range(len(self.replica_engines))
+        ]
+        self._replica_turn = itertools.count()
+
     async def close(self) -> None:
+        for replica_engine in self.replica_engines:
+            await replica_engine.dispose()
+        self.replica_engines = []
+        self._replica_sessionmakers = []
+        self._replica_breakers = []
+
         if self.engine is not None:
             await self.engine.dispose()
             logger.info("Database engine disposed.")
             self.engine = None
             self._sessionmaker = None
 
+    async def _admit(self, breaker: CircuitBreaker, engine: AsyncEngine) -> bool:
+        """Return whether `engine` may be used, probing it if its circuit allows."""
+        if not breaker.allow_request():
+            return False
+        if breaker.state is CircuitState.HALF_OPEN:
+            try:
+                async with engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+            except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+                breaker.record_failure()
+                return False
+            breaker.record_success()
+        return True
+
+    async def _pick_replica(self) -> int | None:
+        """Return the index of the next available replica in round-robin order."""
+        count = len(self.replica_engines)
+        if not count:
+            return None
+        start = next(self._replica_turn)
+        for offset in range(count):
+            index = (start + offset) % count
+            if await self._admit(
+                self._replica_breakers[index], self.replica_engines[index]
+            ):
+                return index
+        return None
+
+    async def warm_up(self, count: int = MIN_CONNECTIONS_COUNT) -> None:
+        """Open `count` connections on every engine and return them to the pool."""
+        engines = [self.engine, *self.replica_engines] if self.engine else []
+        for engine in engines:
+            if isinstance(engine.pool, NullPool):
+                continue
+            # Never wait on a pool smaller than `count`, e.g. a single writer
+            size = (
+                min(count, engine.pool.size())
+                if isinstance(engine.pool, QueuePool)
+                else count
+            )
+            results = await asyncio.gather(
+                *(engine.connect().start() for _ in range(size)),
+                return_exceptions=True,
+            )
+            connections = [
+                result for result in results if isinstance(result, AsyncConnection)
+            ]
+            for connection in connections:
+                await connection.close()
+            if len(connections) < size:
+                logger.warning(
+                    f"Opened {len(connections)} of {size} connections on {engine.url!r}."
+                )
+            else:
+                logger.info(f"Opened {size} connections on {engine.url!r}.")
+
     @asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
         if self.engine is None:
@@ -52,29 +191,262 @@ class DatabaseSessionManager:
                 raise ServiceError
 
     @asynccontextmanager
-    async def session(self) -> AsyncIterator[AsyncSession]:
-        if self._sessionmaker is None:
+    async def session(
+        self, read_only: bool = False, statement_timeout: Optional[float] = None
+    ) -> AsyncIterator[AsyncSession]:
+        """Open a session on the primary, or on a replica if `read_only` is set.
+
+        Reads fall back to the primary when no replica is configured, every
+        replica has recently failed to connect, or the picked replica cannot
+        be reached. A replica whose pool has no connection to spare fails the
+        read as unavailable, like the primary would. On PostgreSQL, every
+        transaction of the session is limited to `statement_timeout` seconds
+        per statement.
+        """
+        if self.engine is None or self._sessionmaker is None:
             logger.error("Sessionmaker is unavailable.")
             raise ServiceError
 
-        logger.debug("Opening database session.")
-        session = self._sessionmaker()
+        session: Optional[AsyncSession] = None
+        replica = await self._pick_replica() if read_only else None
+        if replica is not None:
+            logger.debug(f"Opening read-only database session on replica {replica}.")
+            breaker = self._replica_breakers[replica]
+            session = self._replica_sessionmakers[replica]()
+            if statement_timeout is not None:
+                set_statement_timeout(session, statement_timeout)
+            try:
+                # Connect before handing the session out, so a replica that
+                # went away costs a retry on the primary instead of an error
+                await session.connection()
+            except PoolTimeoutError:
+                # A saturated pool says nothing about the replica's health
+                await session.close()
+                logger.warning(
+                    f"Timed out waiting for a connection to replica {replica}."
+                )
+                raise ServiceUnavailableError(
+                    "Database is busy. Please try again later."
+                )
+            except (OperationalError, InterfaceError, OSError, asyncio.TimeoutError):
+                breaker.record_failure()
+                await session.close()
+                logger.warning(f"Replica {replica} is unreachable, using primary.")
+                session = None
+            except SQLAlchemyError:
+                await session.close()
+                logger.error(f"Error occurred opening a session on replica {replica}.")
+                raise ServiceError
+
+        if session is None:
+            if not await self._admit(self._breaker, self.engine):
+                raise ServiceUnavailableError(
+                    "Database is unavailable. Please try again later."
+                )
+            breaker = self._breaker
+            logger.debug("Opening database session.")
+            session = self._sessionmaker()
+            if statement_timeout is not None:
+                set_statement_timeout(session, statement_timeout)
         try:
             yield session
-        except SQLAlchemyError:
+        except PoolTimeoutError:
             await session.rollback()
+            logger.warning("Timed out waiting for a pooled database connection.")
+            raise ServiceUnavailableError("Database is busy. Please try again later.")
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as exc:
+            await session.rollback()
+            if (
+                isinstance(exc, DBAPIError)
+                and getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
+            ):
+                logger.warning("Database statement exceeded the request deadline.")
+                raise DeadlineExceededError("Request took too long to complete.")
+            # asyncpg reports connect timeouts as asyncio.TimeoutError, which
+            # is not an OSError before Python 3.11
+            if isinstance(
+                exc, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+            ):
+                breaker.record_failure()
             logger.error("Error occurred during database session.")
             raise ServiceError
+        else:
+            breaker.record_success()
         finally:
             await session.close()
             logger.info("Database session closed.")
 
 
-sessionmanager = DatabaseSessionManager(
-    DATABASE_URL.get_secret_value(), pool_size=MAX_CONNECTIONS_COUNT
-)
+def set_statement_timeout(session: AsyncSession, seconds: float) -> None:
+    """Apply PostgreSQL's `statement_timeout` to each transaction the session begins.
+
+    `SET LOCAL` lasts only until the transaction ends, so the setting never
+    leaks to the next user of the pooled connection. Other dialects have no
+    equivalent and are left alone.
+    """
+    if session.bind is None or session.bind.dialect.name != "postgresql":
+        return
+    milliseconds = min(max(1, int(seconds * 1000)), MAX_STATEMENT_TIMEOUT_MS)
+
+    def after_begin(
+        _session: Session, _transaction: SessionTransaction, connection: Connection
+    ) -> None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {milliseconds}")
+
+    event.listen(session.sync_session, "after_begin", after_begin)
+
+
+def prepared_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
 
 
-async def get_db_session():
-    async with sessionmanager.session() as session:
+def engine_options(config: Settings = settings) -> dict:
+    """Build `create_async_engine` keyword arguments from the settings.
+
+    With `db_external_pooler` set, the engine is configured to sit behind a
+    transaction-pooling proxy such as PgBouncer. Prepared statements get
+    unique names and are never cached, because consecutive transactions may
+    run on different server connections. The local pool is then either
+    disabled or kept small, since the proxy owns the server connections.
+    """
+    if config.db_external_pooler:
+        options: dict = dict(
+            connect_args=dict(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=prepared_statement_name,
+            ),
+            pool_pre_ping=config.pool_pre_ping,
+        )
+        if config.db_external_pooler_pool_size > 0:
+            options.update(
+                pool_size=config.db_external_pooler_pool_size,
+                max_overflow=0,
+                pool_timeout=config.pool_timeout,
+                pool_recycle=config.pool_recycle,
+            )
+        else:
+            options.update(poolclass=NullPool)
+        return options
+
+    options = dict(
+        pool_size=config.max_connections_count,
+        max_overflow=config.pool_max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+    )
+    if config.db_sqlite_path is not None:
+        # SQLite allows one writer at a time, so writes share a single
+        # connection and wait for it in the pool instead of failing with
+        # "database is locked"
+        options.update(pool_size=1, max_overflow=0)
+    if config.pool_max_waiters is not None:
+        options.update(poolclass=BoundedQueuePool, max_waiters=config.pool_max_waiters)
+    return options
+
+
+def configure_sqlite(engine: AsyncEngine, config: Settings, read_only: bool) -> None:
+    """Tune every new connection of a SQLite engine for concurrent use.
+
+    WAL lets readers run alongside the writer. The writer starts its
+    transactions with `BEGIN IMMEDIATE`, taking the write lock up front so
+    that another process holding it makes this one wait `busy_timeout`
+    instead of failing halfway through a transaction. Readers are made
+    `query_only` so they can never take the write lock.
+    """
+    pragmas = dict(
+        journal_mode="WAL",
+        synchronous=config.sqlite_synchronous,
+        mmap_size=config.sqlite_mmap_size,
+        cache_size=config.sqlite_cache_size,
+        busy_timeout=config.sqlite_busy_timeout_ms,
+        foreign_keys="ON",
+        query_only="ON" if read_only else "OFF",
+    )
+
+    def on_connect(dbapi_connection, _connection_record: ConnectionPoolEntry) -> None:
+        if not read_only:
+            # Let SQLAlchemy's begin event, not the driver, open transactions
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    event.listen(engine.sync_engine, "connect", on_connect)
+    if not read_only:
+
+        def on_begin(connection: Connection) -> None:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+        event.listen(engine.sync_engine, "begin", on_begin)
+
+
+def create_sqlite_sessionmanager(config: Settings = settings) -> DatabaseSessionManager:
+    """Build a session manager for an embedded SQLite database.
+
+    The primary engine holds the single writer connection. Reads get their own
+    pool of connections, registered as a replica of the same file.
+    """
+    url = config.database_url.get_secret_value()
+    read_options = engine_options(config)
+    read_options.update(pool_size=config.sqlite_read_connections, max_overflow=0)
+    manager = DatabaseSessionManager(
+        url,
+        replica_hosts=[url],
+        replica_engine_kwargs=read_options,
+        **engine_options(config),
+    )
+    if manager.engine is not None:
+        configure_sqlite(manager.engine, config, read_only=False)
+    for replica_engine in manager.replica_engines:
+        configure_sqlite(replica_engine, config, read_only=True)
+    return manager
+
+
+if settings.db_sqlite_path is None:
+    sessionmanager = DatabaseSessionManager(
+        DATABASE_URL.get_secret_value(),
+        replica_hosts=[url.get_secret_value() for url in REPLICA_URLS],
+        **engine_options(),
+    )
+else:
+    sessionmanager = create_sqlite_sessionmanager()
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """End the session's transaction so its connection goes back to the pool.
+
+    Sessions are created with `expire_on_commit=False`, so objects already
+    loaded stay usable, and the session checks out a connection again only if
+    it runs another query.
+    """
+    if session.in_transaction():
+        await session.commit()
+
+
+async def get_db_session(request: Request):
+    async with sessionmanager.session(
+        statement_timeout=request_deadline(request)
+    ) as session:
         yield session
+
+
+async def get_read_db_session(request: Request):
+    async with sessionmanager.session(
+        read_only=True, statement_timeout=request_deadline(request)
+    ) as session:
+        yield session
+
+
+def get_db_session_factory(request: Request) -> SessionFactory:
+    return partial(sessionmanager.session, statement_timeout=request_deadline(request))
+
+
+def get_read_db_session_factory(request: Request) -> SessionFactory:
+    return partial(
+        sessionmanager.session,
+        read_only=True,
+        statement_timeout=request_deadline(request),
+    )
@@ -1,8 +1,7 @@
-from models import Base
-
+from .migrations import run_migrations
 from .session import DatabaseSessionManager
 
 
 async def create_tables(sessionmanager: DatabaseSessionManager) -> None:
-    async with sessionmanager.connect() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Create the schema through the migrations, the same way the app starts up."""
+    await run_migrations(sessionmanager)
@@ -15,6 +15,18 @@ class ServiceError(BuklatApiError):
     pass
 
 
+class ServiceUnavailableError(BuklatApiError):
+    """Service is temporarily overloaded."""
+
+    pass
+
+
+class DeadlineExceededError(BuklatApiError):
+    """Request ran past its deadline."""
+
+    pass
+
+
 class EntityAlreadyExistsError(BuklatApiError):
     """Entity already exists."""
 
@@ -49,3 +61,9 @@ class InvalidAccountError(BuklatApiError):
     """Account has been disabled or deactivated."""
 
     pass
+
+
+class PermissionDeniedError(BuklatApiError):
+    """Account is not allowed to perform this action."""
+
+    pass
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from typing import Callable
+from typing import Callable, Dict, Optional
 
 from fastapi import Depends, FastAPI, Request, Response, status
 from fastapi.responses import JSONResponse
@@ -9,18 +9,23 @@ from auth.dependencies import get_current_active_user
 from auth.routes import auth_router
 from config.constants import API_PREFIX, VERSION
 from config.settings import settings
+from core.coalescing import flag_writes
+from core.deadline import CancelOnDisconnectMiddleware
 from core.log import setup_logging
+from database.migrations import run_migrations
 from database.session import sessionmanager
-from database.tables import create_tables
 from exceptions.exceptions import (
     AuthenticationFailed,
     BuklatApiError,
+    DeadlineExceededError,
     EntityAlreadyExistsError,
     EntityDoesNotExistError,
     InvalidAccountError,
     InvalidTokenError,
+    PermissionDeniedError,
     RegistrationFailed,
     ServiceError,
+    ServiceUnavailableError,
 )
 
 setup_logging(settings.debug)
@@ -29,10 +34,12 @@ setup_logging(settings.debug)
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     if sessionmanager.engine is not None:
-        await create_tables(sessionmanager)
+        await run_migrations(sessionmanager)
+        await sessionmanager.warm_up(settings.min_connections_count)
 
     yield
 
+    await flag_writes.drain()
     if sessionmanager.engine is not None:
         await sessionmanager.close()
 
@@ -43,6 +50,8 @@ app = FastAPI(
     version=VERSION,
     lifespan=lifespan,
 )
+app.add_middleware(CancelOnDisconnectMiddleware)
+
 
 @app.get("/")
 def read_root() -> Response:
@@ -56,7 +65,7 @@ app.include_router(auth_router, prefix=API_PREFIX)
 
 
 def create_exception_handler(
-    status_code: int, initial_detail: str
+    status_code: int, initial_detail: str, headers: Optional[Dict[str, str]] = None
 ) -> Callable[[Request, BuklatApiError], JSONResponse]:
     detail = {"message": initial_detail}
 
@@ -67,7 +76,9 @@ def create_exception_handler(
             detail["message"] = f"{detail['message']} [{exc.name}]"
 
         return JSONResponse(
-            status_code=status_code, content={"detail": detail["message"]}
+            status_code=status_code,
+            content={"detail": detail["message"]},
+            headers=headers,
         )
 
     return exception_handler
@@ -114,6 +125,13 @@ app.add_exception_handler(
     ),
 )
 
+app.add_exception_handler(
+    exc_class_or_status_code=PermissionDeniedError,
+    handler=create_exception_handler(
+        status.HTTP_403_FORBIDDEN, "Account is not allowed to do this."
+    ),
+)
+
 app.add_exception_handler(
     exc_class_or_status_code=ServiceError,
     handler=create_exception_handler(
@@ -121,3 +139,20 @@ app.add_exception_handler(
         "A service seems to be down. Please try again later.",
     ),
 )
+
+app.add_exception_handler(
+    exc_class_or_status_code=ServiceUnavailableError,
+    handler=create_exception_handler(
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "The service is busy. Please try again later.",
+        headers={"Retry-After": str(settings.retry_after_seconds)},
+    ),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=DeadlineExceededError,
+    handler=create_exception_handler(
+        status.HTTP_504_GATEWAY_TIMEOUT,
+        "The request took too long to complete.",
+    ),
+)
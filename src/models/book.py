@@ -1,6 +1,6 @@
 from typing import Optional
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -8,6 +8,14 @@ from .base import Base
 
 class Book(Base):
     __tablename__ = "fct_books"
+    # Each index ends with the id, which lists of books are ordered and paged by
+    __table_args__ = (
+        Index("ix_fct_books_author_id_id", "author_id", "id"),
+        Index("ix_fct_books_recommender_id_id", "recommender_id", "id"),
+        Index("ix_fct_books_is_read_is_purchased_id", "is_read", "is_purchased", "id"),
+        Index("ix_fct_books_year_published_id", "year_published", "id"),
+        Index("ix_fct_books_title_id", "title", "id"),
+    )
 
     id: Mapped[Optional[int]] = mapped_column(
         Integer, primary_key=True, autoincrement=True, index=True, nullable=False
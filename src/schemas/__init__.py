@@ -1,3 +1,5 @@
 from .author import Author, AuthorCreate, AuthorUpdate  # type: ignore # noqa
-from .book import Book, BookCreate, BookUpdate  # type: ignore # noqa
+from .book import Book, BookCreate, BookExpanded, BookExpansion, BookFilters, BookFlag, BookListParams, BookSort, BookUpdate, partial_book  # type: ignore # noqa
 from .recommender import Recommender, RecommenderCreate, RecommenderUpdate  # type: ignore # noqa
+from .bulk import BulkResult, BulkStatus  # type: ignore # noqa
+from .imports import ImportReport, ImportRow, ImportRowError  # type: ignore # noqa
@@ -1,13 +1,32 @@
-from typing import Optional
+from enum import Enum
+from functools import lru_cache
+from typing import Annotated, Any, Optional, Tuple, Type
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    create_model,
+    field_validator,
+    model_validator,
+)
+
+from config.constants import MAX_NAME_LENGTH, MAX_YEAR_PUBLISHED, MIN_YEAR_PUBLISHED
+from core.pagination import PageParams, decode_cursor
+
+from .author import Author
+from .recommender import Recommender
+
+# Values that fit the columns they are stored in
+Name = Annotated[str, Field(max_length=MAX_NAME_LENGTH)]
+YearPublished = Annotated[int, Field(ge=MIN_YEAR_PUBLISHED, le=MAX_YEAR_PUBLISHED)]
 
 
 class BookBase(BaseModel):
     author_id: int
     recommender_id: int
-    title: str
-    year_published: int
+    title: Name
+    year_published: YearPublished
     is_purchased: Optional[bool] = None
     is_read: Optional[bool] = None
 
@@ -21,9 +40,103 @@ class BookCreate(BookBase):
 class BookUpdate(BookBase):
     author_id: Optional[int] = None
     recommender_id: Optional[int] = None
-    title: Optional[str] = None
-    year_published: Optional[int] = None
+    title: Optional[Name] = None
+    year_published: Optional[YearPublished] = None
+
+    @field_validator("author_id", "recommender_id", "title", "year_published")
+    @classmethod
+    def reject_null(cls, value: Any) -> Any:
+        # Omitted fields keep their value, but the columns cannot be cleared
+        if value is None:
+            raise ValueError("Field may be omitted but cannot be null.")
+        return value
 
 
 class Book(BookBase):
     id: int
+
+
+@lru_cache(maxsize=None)
+def partial_book(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Return a model of `Book` limited to `fields`, for sparse fieldsets."""
+    return create_model(
+        "PartialBook",
+        **{name: (Book.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+class BookFlag(str, Enum):
+    READ = "is_read"
+    PURCHASED = "is_purchased"
+
+
+class BookExpansion(str, Enum):
+    AUTHOR = "author"
+    RECOMMENDER = "recommender"
+
+
+class BookExpanded(Book):
+    """A book with the related rows named in `?expand=` embedded."""
+
+    author: Optional[Author] = None
+    recommender: Optional[Recommender] = None
+
+
+class BookSort(str, Enum):
+    ID = "id"
+    ID_DESC = "-id"
+    TITLE = "title"
+    TITLE_DESC = "-title"
+    YEAR_PUBLISHED = "year_published"
+    YEAR_PUBLISHED_DESC = "-year_published"
+
+    @property
+    def key(self) -> str:
+        return self.value.lstrip("-")
+
+    @property
+    def descending(self) -> bool:
+        return self.value.startswith("-")
+
+
+class BookFilters(BaseModel):
+    """Query parameters that narrow down and order a listing of books."""
+
+    author_id: Optional[int] = None
+    recommender_id: Optional[int] = None
+    is_read: Optional[bool] = None
+    is_purchased: Optional[bool] = None
+    year_published: Optional[int] = None
+    sort: BookSort = BookSort.ID
+
+
+class BookListParams(PageParams, BookFilters):
+    """Filters, sort order and keyset pagination for listing books.
+
+    Cursors hold the sort key of the last row followed by its id, so a cursor
+    is only valid for the sort order that produced it.
+    """
+
+    @model_validator(mode="after")
+    def validate_cursor_matches_sort(self) -> "BookListParams":
+        if self.after is None:
+            return self
+        values = decode_cursor(self.after)
+        if self.sort.key == "id":
+            matches = len(values) == 1
+        else:
+            sort_type = Book.model_fields[self.sort.key].annotation
+            matches = (
+                len(values) == 2
+                and isinstance(values[0], sort_type)
+                and not isinstance(values[0], bool)
+            )
+        if not matches:
+            raise ValueError("Pagination cursor does not match the sort order.")
+        return self
+
+    @property
+    def after_value(self) -> Any:
+        if self.after is None or self.sort.key == "id":
+            return None
+        return decode_cursor(self.after)[0]
@@ -0,0 +1,22 @@
+from enum import Enum
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class BulkStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    CONFLICT = "conflict"
+    INVALID = "invalid"
+    NOT_FOUND = "not_found"
+
+
+class BulkResult(BaseModel, Generic[T]):
+    index: int
+    status: BulkStatus
+    item: Optional[T] = None
+    detail: Optional[str] = None
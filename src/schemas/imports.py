@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from config.constants import MAX_IMPORT_ERRORS
+
+from .book import Name, YearPublished
+
+
+class ImportRow(BaseModel):
+    title: Name
+    author: Name
+    recommender: Name
+    year_published: YearPublished
+    is_purchased: Optional[bool] = None
+    is_read: Optional[bool] = None
+
+    # Lax, since CSV delivers every value as a string
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+
+class ImportRowError(BaseModel):
+    line: int
+    detail: str
+
+
+class ImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
+    def reject(self, line: int, detail: str) -> None:
+        """Count a rejected row, keeping details for the first few only."""
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append(ImportRowError(line=line, detail=detail))
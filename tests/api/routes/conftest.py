@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 import pytest_asyncio
@@ -8,7 +9,15 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 
 import models
 from api.routes import authors, books, recommenders
-from database.session import get_db_session
+from auth.dependencies import get_current_admin_user
+from core.counting import count_cache
+from core.limiter import limiter
+from database.session import (
+    get_db_session,
+    get_db_session_factory,
+    get_read_db_session,
+    get_read_db_session_factory,
+)
 
 # Set up test app
 test_app = FastAPI()
@@ -50,10 +59,26 @@ async def testing_session() -> AsyncGenerator[AsyncSession, None]:
 
 @pytest_asyncio.fixture
 async def async_client(testing_session) -> AsyncGenerator[AsyncClient, None]:
+    # Rate limits and counts are per process, so start every test afresh
+    limiter.reset()
+    count_cache.clear()
+
     async def override_get_db_session():
         yield testing_session
 
+    @asynccontextmanager
+    async def testing_session_factory():
+        yield testing_session
+
     test_app.dependency_overrides[get_db_session] = override_get_db_session
+    test_app.dependency_overrides[get_read_db_session] = override_get_db_session
+    test_app.dependency_overrides[get_current_admin_user] = lambda: None
+    test_app.dependency_overrides[get_read_db_session_factory] = (
+        lambda: testing_session_factory
+    )
+    test_app.dependency_overrides[get_db_session_factory] = (
+        lambda: testing_session_factory
+    )
 
     async with AsyncClient(
         transport=ASGITransport(app=test_app), base_url="http://test"
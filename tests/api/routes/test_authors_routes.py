@@ -40,6 +40,42 @@ async def test_create_author_regular(async_client: AsyncClient) -> None:
     assert response.json()["name"] == "Doe, John"
 
 
+@pytest.mark.asyncio
+async def test_create_authors_returns_conflict_for_existing_names(
+    async_client: AsyncClient,
+) -> None:
+    payload = [{"name": "Doe, John"}, {"name": "Orwell, George"}, {"name": "Doe, John"}]
+    response = await async_client.post(URL_PREFIX + "bulk", json=payload)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == [
+        "created",
+        "conflict",
+        "conflict",
+    ]
+    assert results[0]["item"]["name"] == "Doe, John"
+
+
+@pytest.mark.asyncio
+async def test_resolve_authors_returns_ids_for_names(async_client: AsyncClient) -> None:
+    payload = ["Orwell, George", "Doe, John"]
+    response = await async_client.post(URL_PREFIX + "resolve", json=payload)
+
+    assert response.status_code == 200
+    assert [author["name"] for author in response.json()] == payload
+    assert response.json()[0]["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_authors_returns_http_422_for_empty_list(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.post(URL_PREFIX + "resolve", json=[])
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_read_author_returns_http_422_for_invalid_input_value(
     async_client: AsyncClient,
@@ -80,6 +116,30 @@ async def test_read_authors_returns_empty_list_for_empty_table(
     assert response.json() == []
 
 
+@pytest.mark.asyncio
+async def test_read_authors_paginates_with_cursor(async_client: AsyncClient) -> None:
+    first_page = await async_client.get(URL_PREFIX, params={"limit": 1})
+    second_page = await async_client.get(
+        URL_PREFIX,
+        params={"limit": 1, "after": first_page.headers["X-Next-Cursor"]},
+    )
+
+    assert [author["id"] for author in first_page.json()] == [1]
+    assert [author["id"] for author in second_page.json()] == [2]
+
+
+@pytest.mark.asyncio
+async def test_read_authors_sends_total_count_on_request(
+    async_client: AsyncClient,
+) -> None:
+    before = await async_client.get(URL_PREFIX, params={"total": "true"})
+    await async_client.delete(URL_PREFIX + "2")
+    after = await async_client.get(URL_PREFIX, params={"total": "true"})
+
+    assert before.headers["X-Total-Count"] == "2"
+    assert after.headers["X-Total-Count"] == "1"
+
+
 @pytest.mark.asyncio
 async def test_update_author_returns_http_422_for_invalid_id_value(
     async_client: AsyncClient,
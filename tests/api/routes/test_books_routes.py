@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -113,6 +115,17 @@ async def test_create_book_returns_http_422_for_improper_title_type(
     assert response.status_code == 422
 
 
+@pytest.mark.asyncio
+async def test_create_book_returns_http_422_for_overlong_title(
+    async_client: AsyncClient,
+) -> None:
+    payload = TEST_PAYLOAD.copy()
+    payload["title"] = "x" * 65
+    response = await async_client.post(URL_PREFIX, json=payload)
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_create_book_returns_http_422_for_improper_year_published_type(
     async_client: AsyncClient,
@@ -195,6 +208,94 @@ async def test_create_book_with_both_is_purchased_and_is_read_true(
         assert response.json()[key] == payload[key]
 
 
+@pytest.mark.asyncio
+async def test_create_books_returns_http_422_for_empty_list(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.post(URL_PREFIX + "bulk", json=[])
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_books_returns_http_422_for_any_invalid_item(
+    async_client: AsyncClient,
+) -> None:
+    payload = [TEST_PAYLOAD, {**TEST_PAYLOAD, "title": False}]
+    response = await async_client.post(URL_PREFIX + "bulk", json=payload)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_books_returns_result_per_item(async_client: AsyncClient) -> None:
+    payload = [TEST_PAYLOAD, {**TEST_PAYLOAD, "author_id": 7}, TEST_BOOK_2]
+    response = await async_client.post(URL_PREFIX + "bulk", json=payload)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["status"] for result in results] == [
+        "created",
+        "invalid",
+        "created",
+    ]
+    assert results[0]["item"]["title"] == "test-book"
+    assert "Author with id 7" in results[1]["detail"]
+    assert results[2]["item"]["title"] == "Animal Farm"
+
+
+@pytest.mark.asyncio
+async def test_import_books_returns_http_415_for_unsupported_upload(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.post(
+        URL_PREFIX + "import", content=b"{}", headers={"Content-Type": "text/plain"}
+    )
+
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_import_books_from_csv(async_client: AsyncClient) -> None:
+    upload = (
+        "title,author,recommender,year_published,is_purchased\n"
+        '1984,"Orwell, George","Klavan, Andrew",1949,true\n'
+        'Demons,"Dostoevsky, Fyodor","Klavan, Andrew",unknown,\n'
+    )
+    response = await async_client.post(
+        URL_PREFIX + "import",
+        content=upload.encode(),
+        headers={"Content-Type": "text/csv; charset=utf-8"},
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 1
+    assert report["failed"] == 1
+    assert report["errors"][0]["line"] == 3
+
+    response = await async_client.get(URL_PREFIX)
+    assert response.json()[0]["author_id"] == 1
+    assert response.json()[0]["recommender_id"] == 2
+
+
+@pytest.mark.asyncio
+async def test_load_books_from_ndjson(async_client: AsyncClient) -> None:
+    upload = "\n".join(
+        json.dumps({**TEST_BOOK_2, "author": "Orwell, George", "recommender": name})
+        for name in ("Klavan, Andrew", "Doe, John")
+    )
+
+    response = await async_client.post(
+        URL_PREFIX + "load",
+        content=upload.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+
 @pytest.mark.asyncio
 async def test_read_book_returns_http_422_for_improper_book_id_input(
     async_client: AsyncClient,
@@ -251,6 +352,393 @@ async def test_read_books_regular(
         assert response.json()[1][key] == TEST_BOOK_2[key]
 
 
+@pytest.mark.asyncio
+async def test_read_books_paginates_with_cursor(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    first_page = await async_client.get(URL_PREFIX, params={"limit": 1})
+    cursor = first_page.headers["X-Next-Cursor"]
+    second_page = await async_client.get(
+        URL_PREFIX, params={"limit": 1, "after": cursor}
+    )
+    last_page = await async_client.get(
+        URL_PREFIX,
+        params={"limit": 1, "after": second_page.headers["X-Next-Cursor"]},
+    )
+
+    assert first_page.json()[0]["title"] == TEST_BOOK_1["title"]
+    assert second_page.json()[0]["title"] == TEST_BOOK_2["title"]
+    assert last_page.json() == []
+    assert "X-Next-Cursor" not in last_page.headers
+
+
+@pytest.mark.asyncio
+async def test_read_books_filters_by_query_parameters(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    unread = await async_client.get(URL_PREFIX, params={"is_read": "false"})
+    by_year = await async_client.get(URL_PREFIX, params={"year_published": 1949})
+    by_author = await async_client.get(URL_PREFIX, params={"author_id": 2})
+
+    assert [book["title"] for book in unread.json()] == [TEST_BOOK_2["title"]]
+    assert [book["title"] for book in by_year.json()] == [TEST_BOOK_1["title"]]
+    assert by_author.json() == []
+
+
+@pytest.mark.asyncio
+async def test_read_books_paginates_in_sort_order(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    first_page = await async_client.get(
+        URL_PREFIX, params={"limit": 1, "sort": "-title"}
+    )
+    second_page = await async_client.get(
+        URL_PREFIX,
+        params={
+            "limit": 1,
+            "sort": "-title",
+            "after": first_page.headers["X-Next-Cursor"],
+        },
+    )
+
+    assert first_page.json()[0]["title"] == TEST_BOOK_2["title"]
+    assert second_page.json()[0]["title"] == TEST_BOOK_1["title"]
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_cursor_of_another_sort_order(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+    first_page = await async_client.get(URL_PREFIX, params={"limit": 1})
+
+    response = await async_client.get(
+        URL_PREFIX,
+        params={"sort": "title", "after": first_page.headers["X-Next-Cursor"]},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_cursor_value_of_another_type(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+    title_page = await async_client.get(
+        URL_PREFIX, params={"sort": "title", "limit": 1}
+    )
+
+    response = await async_client.get(
+        URL_PREFIX,
+        params={
+            "sort": "year_published",
+            "after": title_page.headers["X-Next-Cursor"],
+        },
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_unknown_sort_key(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(URL_PREFIX, params={"sort": "author"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_book_embeds_author_and_recommender(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(
+        f"{URL_PREFIX}1", params={"expand": "author,recommender"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["author"] == {"id": 1, "name": "Orwell, George"}
+    assert response.json()["recommender"] == {"id": 1, "name": "Peterson, Jordan"}
+
+
+@pytest.mark.asyncio
+async def test_read_books_embeds_only_requested_expansions(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    expanded = await async_client.get(URL_PREFIX, params={"expand": "recommender"})
+    plain = await async_client.get(URL_PREFIX)
+
+    assert [book["recommender"]["name"] for book in expanded.json()] == [
+        "Peterson, Jordan",
+        "Peterson, Jordan",
+    ]
+    assert expanded.json()[0]["author"] is None
+    assert "recommender" not in plain.json()[0]
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_unknown_expansion(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(URL_PREFIX, params={"expand": "author,isbn"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_only_requested_fields(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    first_page = await async_client.get(
+        URL_PREFIX, params={"fields": "is_read", "sort": "-title", "limit": 1}
+    )
+    second_page = await async_client.get(
+        URL_PREFIX,
+        params={
+            "fields": "is_read",
+            "sort": "-title",
+            "after": first_page.headers["X-Next-Cursor"],
+        },
+    )
+
+    assert first_page.json() == [{"id": 2, "title": "Animal Farm", "is_read": False}]
+    assert second_page.json() == [{"id": 1, "title": "1984", "is_read": True}]
+
+
+@pytest.mark.asyncio
+async def test_read_book_returns_only_requested_fields(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(
+        f"{URL_PREFIX}1", params={"fields": "title,year_published"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"id": 1, "title": "1984", "year_published": 1949}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params", [{"fields": "title,isbn"}, {"fields": "title", "expand": "author"}]
+)
+async def test_read_books_returns_http_422_for_invalid_fields(
+    async_client: AsyncClient, params: dict
+) -> None:
+    response = await async_client.get(URL_PREFIX, params=params)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_mark_book_read_and_purchased(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    unread = await async_client.patch(f"{URL_PREFIX}1/read", json={"is_read": False})
+    purchased = await async_client.patch(f"{URL_PREFIX}2/purchased")
+
+    assert unread.status_code == 200
+    assert unread.json()["is_read"] is False
+    assert unread.json()["is_purchased"] is True
+    assert purchased.json()["is_purchased"] is True
+
+
+@pytest.mark.asyncio
+async def test_mark_book_read_raises_for_missing_book(
+    async_client: AsyncClient,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await async_client.patch(f"{URL_PREFIX}9/read")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("field", ["author_id", "title"])
+async def test_update_book_returns_http_422_for_null_required_field(
+    testing_session: AsyncSession, async_client: AsyncClient, field: str
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.put(f"{URL_PREFIX}1", json={field: None})
+    assert response.status_code == 422
+    response = await async_client.patch(
+        URL_PREFIX, params={"ids": "1"}, json={field: None}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_update_books_patches_every_listed_book(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.patch(
+        URL_PREFIX, params={"ids": "1,2,9"}, json={"is_read": True}
+    )
+
+    assert response.status_code == 200
+    assert [(r["item"], r["status"]) for r in response.json()] == [
+        (1, "updated"),
+        (2, "updated"),
+        (9, "not_found"),
+    ]
+    books = await async_client.get(URL_PREFIX)
+    assert all(book["is_read"] for book in books.json())
+
+
+@pytest.mark.asyncio
+async def test_delete_books_deletes_every_listed_book(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.delete(URL_PREFIX, params={"ids": "2"})
+    missing_ids = await async_client.delete(URL_PREFIX)
+
+    assert response.json() == [
+        {"index": 0, "status": "deleted", "item": 2, "detail": None}
+    ]
+    assert [book["id"] for book in (await async_client.get(URL_PREFIX)).json()] == [1]
+    assert missing_ids.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_sends_total_count_on_request(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    total = await async_client.get(URL_PREFIX, params={"total": "true", "limit": 1})
+    unread = await async_client.get(
+        URL_PREFIX, params={"total": "true", "is_read": "false"}
+    )
+    await async_client.post(URL_PREFIX, json=TEST_PAYLOAD)
+    after_create = await async_client.get(URL_PREFIX, params={"total": "true"})
+    without = await async_client.get(URL_PREFIX)
+
+    assert total.headers["X-Total-Count"] == "2"
+    assert unread.headers["X-Total-Count"] == "1"
+    assert after_create.headers["X-Total-Count"] == "3"
+    assert "X-Total-Count" not in without.headers
+
+
+@pytest.mark.asyncio
+async def test_read_books_by_ids_keeps_requested_order(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(URL_PREFIX, params={"ids": "2,9,1,2"})
+
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()] == [2, 1]
+    assert response.headers["X-Missing-Ids"] == "9"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ids", ["", "1,,2", "one", "-1"])
+async def test_read_books_returns_http_422_for_invalid_ids(
+    async_client: AsyncClient, ids: str
+) -> None:
+    response = await async_client.get(URL_PREFIX, params={"ids": ids})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_invalid_cursor(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(URL_PREFIX, params={"after": "not-a-cursor"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_returns_http_422_for_limit_out_of_range(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(URL_PREFIX, params={"limit": 0})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_read_books_streams_ndjson(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(
+        URL_PREFIX, headers={"Accept": "application/x-ndjson"}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert len(lines) == 2
+    for key in TEST_BOOK_1:
+        assert lines[0][key] == TEST_BOOK_1[key]
+    for key in TEST_BOOK_2:
+        assert lines[1][key] == TEST_BOOK_2[key]
+
+
+@pytest.mark.asyncio
+async def test_export_books_as_csv(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(URL_PREFIX + "export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "books.csv" in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert lines[0] == "id,title,author,recommender,year_published,is_purchased,is_read"
+    assert lines[1] == '1,1984,"Orwell, George","Peterson, Jordan",1949,True,True'
+    assert len(lines) == 3
+
+
+@pytest.mark.asyncio
+async def test_export_books_as_jsonl(
+    testing_session: AsyncSession, async_client: AsyncClient
+) -> None:
+    await setup_books_table(testing_session)
+
+    response = await async_client.get(URL_PREFIX + "export", params={"format": "jsonl"})
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["1984", "Animal Farm"]
+    assert rows[0]["recommender"] == "Peterson, Jordan"
+
+
+@pytest.mark.asyncio
+async def test_export_books_returns_http_422_for_unknown_format(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(URL_PREFIX + "export", params={"format": "xls"})
+
+    assert response.status_code == 422
+
+
 @pytest.mark.asyncio
 async def test_update_book_returns_http_422_for_improper_book_id_type(
     async_client: AsyncClient,
@@ -80,6 +80,18 @@ async def test_read_recommenders_returns_empty_list_for_empty_table(
     assert response.json() == []
 
 
+@pytest.mark.asyncio
+async def test_read_recommenders_sends_total_count_on_request(
+    async_client: AsyncClient,
+) -> None:
+    before = await async_client.get(URL_PREFIX, params={"total": "true"})
+    await async_client.delete(URL_PREFIX + "2")
+    after = await async_client.get(URL_PREFIX, params={"total": "true"})
+
+    assert before.headers["X-Total-Count"] == "2"
+    assert after.headers["X-Total-Count"] == "1"
+
+
 @pytest.mark.asyncio
 async def test_update_recommender_returns_http_422_for_invalid_id_value(
     async_client: AsyncClient,
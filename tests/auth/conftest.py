@@ -11,7 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from auth.models import DBUser
 from auth.routes import auth_router
 from auth.utils import get_password_hash
-from database.session import get_db_session
+from database.session import get_db_session, get_read_db_session
 from models import Base
 
 # Set up test objects
@@ -78,6 +78,7 @@ async def async_client(testing_session) -> AsyncGenerator[AsyncClient, None]:
         yield testing_session
 
     test_app.dependency_overrides[get_db_session] = override_get_db_session
+    test_app.dependency_overrides[get_read_db_session] = override_get_db_session
 
     async with AsyncClient(
         transport=ASGITransport(app=test_app), base_url="http://test"
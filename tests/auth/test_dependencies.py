@@ -1,13 +1,24 @@
+import inspect
 from datetime import datetime
 from unittest.mock import patch
 
 import pytest
 from pydantic import SecretStr
 
-from auth.dependencies import get_current_active_user, get_current_user
+from auth.dependencies import (
+    get_current_active_user,
+    get_current_admin_user,
+    get_current_user,
+)
 from auth.models import User
 from auth.utils import create_access_token
-from exceptions.exceptions import InvalidAccountError, InvalidTokenError
+from config.settings import settings
+from database.session import get_read_db_session
+from exceptions.exceptions import (
+    InvalidAccountError,
+    InvalidTokenError,
+    PermissionDeniedError,
+)
 
 
 @patch("auth.utils.SECRET_KEY", new=SecretStr("strongkey"))
@@ -70,6 +81,26 @@ async def test_get_current_user_regular(testing_data, testing_session) -> None:
     assert user.is_active
 
 
+@patch("auth.utils.SECRET_KEY", new=SecretStr("strongkey"))
+@patch("auth.utils.ALGORITHM", new=SecretStr("HS256"))
+@pytest.mark.asyncio
+async def test_get_current_user_releases_connection(
+    testing_data, testing_session
+) -> None:
+    token = create_access_token(testing_data["token_payload"])
+
+    await get_current_user(token, testing_session)
+
+    assert not testing_session.in_transaction()
+
+
+def test_get_current_user_reads_from_read_session() -> None:
+    # On SQLite the primary session takes the write lock for its transaction
+    db = inspect.signature(get_current_user).parameters["db"].default
+
+    assert db.dependency is get_read_db_session
+
+
 @pytest.mark.asyncio
 async def test_get_current_active_user_raises_InvalidAccountError() -> None:
     # Create a deactivated user
@@ -95,3 +126,22 @@ async def test_get_current_active_user_regular(testing_data) -> None:
     assert active_user.username == testing_data["username"]
     assert active_user.email == testing_data["email"]
     assert active_user.is_active
+
+
+@pytest.mark.asyncio
+async def test_get_current_admin_user_raises_PermissionDeniedError(
+    monkeypatch,
+) -> None:
+    monkeypatch.setattr(settings, "admin_usernames", ["admin"])
+    user = User(username="reader", email="some@email.com", is_active=True)
+
+    with pytest.raises(PermissionDeniedError):
+        await get_current_admin_user(current_user=user)
+
+
+@pytest.mark.asyncio
+async def test_get_current_admin_user_regular(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "admin_usernames", ["admin"])
+    admin = User(username="admin", email="some@email.com", is_active=True)
+
+    assert await get_current_admin_user(current_user=admin) == admin
@@ -11,7 +11,8 @@ import models
 from auth.dependencies import get_current_active_user
 from auth.models import DBUser, User
 from auth.utils import get_password_hash
-from database.session import get_db_session
+from core.limiter import limiter
+from database.session import get_db_session, get_read_db_session
 from main import app
 
 TEST_DATA = {
@@ -115,6 +116,9 @@ async def override_get_current_active_user(testing_data) -> AsyncGenerator[User,
 async def async_client(
     testing_session, override_get_current_active_user
 ) -> AsyncGenerator[AsyncClient, None]:
+    # Rate limits are per process, so start every test with a fresh budget
+    limiter.reset()
+
     async def override_db():
         yield testing_session
 
@@ -122,6 +126,7 @@ async def async_client(
         yield override_get_current_active_user
 
     app.dependency_overrides[get_db_session] = override_db
+    app.dependency_overrides[get_read_db_session] = override_db
     app.dependency_overrides[get_current_active_user] = override_user
 
     async with AsyncClient(
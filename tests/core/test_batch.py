@@ -0,0 +1,31 @@
+import pytest
+from fastapi import HTTPException, Response
+
+from config.constants import MAX_PAGE_SIZE
+from core.batch import requested_ids, required_ids, set_missing_ids
+
+
+def test_requested_ids_drops_repeats_in_order() -> None:
+    assert requested_ids("3,1,3,2") == [3, 1, 2]
+    assert requested_ids(None) is None
+
+
+def test_requested_ids_rejects_too_many_ids() -> None:
+    ids = ",".join(str(id) for id in range(MAX_PAGE_SIZE + 1))
+
+    with pytest.raises(HTTPException) as exc_info:
+        requested_ids(ids)
+    assert exc_info.value.status_code == 422
+
+
+def test_required_ids_parses_like_requested_ids() -> None:
+    assert required_ids("2,2,1") == [2, 1]
+
+
+def test_set_missing_ids_only_when_some_are_missing() -> None:
+    response = Response()
+    set_missing_ids(response, [])
+    assert "X-Missing-Ids" not in response.headers
+
+    set_missing_ids(response, [4, 7])
+    assert response.headers["X-Missing-Ids"] == "4,7"
@@ -0,0 +1,91 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from core.coalescing import WriteCoalescer
+
+
+@pytest.mark.asyncio
+async def test_write_coalescer_writes_latest_value_once_per_window() -> None:
+    coalescer = WriteCoalescer(window=0.05)
+    written: List[bool] = []
+
+    async def write(value: bool) -> bool:
+        written.append(value)
+        return value
+
+    results = await asyncio.gather(
+        coalescer.submit(1, True, write),
+        coalescer.submit(1, False, write),
+        coalescer.submit(2, True, write),
+    )
+
+    assert results == [False, False, True]
+    assert sorted(written) == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_write_coalescer_without_window_writes_through() -> None:
+    coalescer = WriteCoalescer(window=0)
+    written: List[int] = []
+
+    async def write(value: int) -> int:
+        written.append(value)
+        return value
+
+    assert await asyncio.gather(
+        coalescer.submit("key", 1, write), coalescer.submit("key", 2, write)
+    ) == [1, 2]
+    assert written == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_write_coalescer_outlives_cancelled_first_caller() -> None:
+    coalescer = WriteCoalescer(window=0.05)
+    written: List[str] = []
+
+    async def write(value: str) -> str:
+        written.append(value)
+        return value
+
+    first = asyncio.create_task(coalescer.submit("key", "first", write))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await coalescer.submit("key", "second", write) == "second"
+    assert written == ["second"]
+
+
+@pytest.mark.asyncio
+async def test_write_coalescer_raises_write_errors_to_every_caller() -> None:
+    coalescer = WriteCoalescer(window=0.01)
+
+    async def write(value: int) -> int:
+        raise LookupError(value)
+
+    results = await asyncio.gather(
+        coalescer.submit(1, 1, write),
+        coalescer.submit(1, 2, write),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_write_coalescer_drain_flushes_pending_writes() -> None:
+    coalescer = WriteCoalescer(window=60)
+    written: List[str] = []
+
+    async def write(value: str) -> str:
+        written.append(value)
+        return value
+
+    submitted = asyncio.create_task(coalescer.submit("key", "value", write))
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(coalescer.drain(), 1)
+
+    assert written == ["value"]
+    assert await submitted == "value"
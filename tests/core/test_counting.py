@@ -0,0 +1,55 @@
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+import models
+from core.counting import CountCache, count_cache
+
+
+def test_count_cache_expires_and_invalidates_per_table() -> None:
+    now = 0.0
+    cache = CountCache(ttl=10, clock=lambda: now)
+    cache.set("fct_books", (), 3)
+    cache.set("fct_books", (("is_read", True),), 1)
+    cache.set("dim_authors", (), 2)
+
+    cache.invalidate("fct_books")
+    assert cache.get("fct_books") is None
+    assert cache.get("fct_books", (("is_read", True),)) is None
+    assert cache.get("dim_authors") == 2
+
+    now = 10.0
+    assert cache.get("dim_authors") is None
+
+
+def test_count_cache_skips_counts_taken_right_after_invalidation() -> None:
+    now = 0.0
+    cache = CountCache(ttl=60, settle=5, clock=lambda: now)
+    cache.invalidate("fct_books")
+
+    # A replica may still be behind the write that invalidated the count
+    now = 4.0
+    cache.set("fct_books", (), 3)
+    assert cache.get("fct_books") is None
+
+    now = 5.0
+    cache.set("fct_books", (), 4)
+    assert cache.get("fct_books") == 4
+
+
+def test_commits_invalidate_only_written_tables() -> None:
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    count_cache.clear()
+    count_cache.set("dim_authors", (), 0)
+    count_cache.set("dim_recommenders", (), 0)
+
+    with Session(engine) as session:
+        session.execute(insert(models.Author).values(name="Orwell, George"))
+        session.rollback()
+        assert count_cache.get("dim_authors") == 0
+
+        session.add(models.Recommender(name="Peterson, Jordan"))
+        session.commit()
+
+    assert count_cache.get("dim_authors") == 0
+    assert count_cache.get("dim_recommenders") is None
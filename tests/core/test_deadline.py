@@ -0,0 +1,161 @@
+import asyncio
+from typing import List
+
+import pytest
+from fastapi import Request
+from starlette.types import Message
+
+from config.settings import settings
+from core.deadline import CancelOnDisconnectMiddleware, request_deadline
+
+
+class Route:
+    name = "read_books"
+
+
+def make_request(headers: dict | None = None) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/books/",
+            "headers": [
+                (key.lower().encode(), value.encode())
+                for key, value in (headers or {}).items()
+            ],
+            "route": Route(),
+        }
+    )
+
+
+def test_request_deadline_defaults_to_settings(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "statement_timeout_seconds", 5.0)
+    assert request_deadline(make_request()) == 5.0
+
+
+def test_request_deadline_is_unbounded_by_default(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "statement_timeout_seconds", None)
+    assert request_deadline(make_request()) is None
+
+
+def test_request_deadline_uses_route_timeout(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "statement_timeout_seconds", 5.0)
+    monkeypatch.setattr(settings, "route_statement_timeouts", {"read_books": 2.0})
+    assert request_deadline(make_request()) == 2.0
+
+
+@pytest.mark.parametrize(
+    "header, expected", [("1.5", 1.5), ("10", 5.0), ("0", 5.0), ("soon", 5.0)]
+)
+def test_request_deadline_can_only_be_tightened_by_client(
+    monkeypatch, header: str, expected: float
+) -> None:
+    monkeypatch.setattr(settings, "statement_timeout_seconds", 5.0)
+    request = make_request({"X-Request-Timeout": header})
+    assert request_deadline(request) == expected
+
+
+@pytest.mark.parametrize(
+    "header, expected", [("inf", None), ("nan", None), ("1e10", 3600.0), ("2", 2.0)]
+)
+def test_request_deadline_bounds_client_timeout_without_default(
+    monkeypatch, header: str, expected: float | None
+) -> None:
+    monkeypatch.setattr(settings, "statement_timeout_seconds", None)
+    monkeypatch.setattr(settings, "max_statement_timeout_seconds", 3600.0)
+    request = make_request({"X-Request-Timeout": header})
+    assert request_deadline(request) == expected
+
+
+@pytest.mark.asyncio
+async def test_middleware_cancels_handler_on_disconnect() -> None:
+    cancelled = asyncio.Event()
+
+    async def app(scope, receive, send) -> None:
+        await receive()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [
+        {"type": "http.request", "body": b"", "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive() -> Message:
+        await asyncio.sleep(0.01)
+        return messages.pop(0)
+
+    async def send(message: Message) -> None:
+        pass
+
+    middleware = CancelOnDisconnectMiddleware(app)
+    await asyncio.wait_for(middleware({"type": "http", "path": "/"}, receive, send), 1)
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_middleware_passes_request_body_through() -> None:
+    received: List[Message] = []
+
+    async def app(scope, receive, send) -> None:
+        received.append(await receive())
+        received.append(await receive())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    messages = [
+        {"type": "http.request", "body": b"a", "more_body": True},
+        {"type": "http.request", "body": b"b", "more_body": False},
+    ]
+
+    async def receive() -> Message:
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    sent: List[Message] = []
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    middleware = CancelOnDisconnectMiddleware(app)
+    await middleware({"type": "http", "path": "/"}, receive, send)
+
+    assert [message["body"] for message in received] == [b"a", b"b"]
+    assert sent[0]["status"] == 200
+
+
+@pytest.mark.asyncio
+async def test_middleware_lets_teardown_finish_after_response() -> None:
+    torn_down = asyncio.Event()
+
+    async def app(scope, receive, send) -> None:
+        await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        # Like a yield dependency closing its session after the response
+        await asyncio.sleep(0.05)
+        torn_down.set()
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    response_sent = asyncio.Event()
+
+    async def receive() -> Message:
+        # Like uvicorn, report a disconnect as soon as the response is sent
+        if messages:
+            return messages.pop(0)
+        await response_sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.body":
+            response_sent.set()
+
+    middleware = CancelOnDisconnectMiddleware(app)
+    await asyncio.wait_for(middleware({"type": "http", "path": "/"}, receive, send), 1)
+
+    assert torn_down.is_set()
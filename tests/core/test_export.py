@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List
+
+import pytest
+from fastapi import HTTPException
+
+from core import export
+from core.export import ExportFormat, encode_csv, encode_jsonl
+
+ROWS = [
+    (1, "1984", "Orwell, George", "Prager, Dennis", 1949, True, True),
+    (2, "Animal Farm", "Orwell, George", "Prager, Dennis", 1945, False, None),
+]
+
+
+async def chunks() -> AsyncIterator[List[tuple]]:
+    yield ROWS[:1]
+    yield ROWS[1:]
+
+
+@pytest.mark.asyncio
+async def test_encode_csv_writes_header_then_rows() -> None:
+    data = "".join([part async for part in encode_csv(chunks())])
+
+    rows = list(csv.reader(io.StringIO(data)))
+    assert rows[0] == list(export.EXPORT_COLUMNS)
+    assert rows[1][:2] == ["1", "1984"]
+    assert rows[2][-1] == ""
+    assert len(rows) == 3
+
+
+@pytest.mark.asyncio
+async def test_encode_jsonl_writes_one_object_per_row() -> None:
+    data = "".join([part async for part in encode_jsonl(chunks())])
+
+    lines = [json.loads(line) for line in data.splitlines()]
+    assert lines[1]["title"] == "Animal Farm"
+    assert lines[1]["is_read"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("export_format", [ExportFormat.PARQUET, ExportFormat.ARROW])
+async def test_encode_columnar_round_trips(export_format: ExportFormat) -> None:
+    pa = pytest.importorskip("pyarrow")
+    data = b"".join(
+        [part async for part in export.encode_columnar(chunks(), export_format)]
+    )
+
+    if export_format is ExportFormat.PARQUET:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    assert table.column("title").to_pylist() == ["1984", "Animal Farm"]
+
+
+def test_export_response_requires_pyarrow_for_columnar_formats(monkeypatch) -> None:
+    monkeypatch.setattr(export, "pa", None)
+
+    with pytest.raises(HTTPException) as exc_info:
+        export.export_response(None, None, ExportFormat.PARQUET)
+    assert exc_info.value.status_code == 501
@@ -0,0 +1,97 @@
+from typing import AsyncIterator, List
+
+import pytest
+
+from config.constants import MAX_IMPORT_LINE_LENGTH
+from core.importing import CSV_MEDIA_TYPE, parse_records, read_lines
+from core.streaming import NDJSON_MEDIA_TYPE
+from schemas import ImportRow
+
+
+async def chunks_of(data: bytes, size: int = 7) -> AsyncIterator[bytes]:
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def collect(iterator) -> List:
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_read_lines_splits_across_chunk_boundaries() -> None:
+    lines = await collect(read_lines(chunks_of("﻿a\r\nbé\n\nc".encode())))
+
+    assert lines == [(1, "a"), (2, "bé"), (3, ""), (4, "c")]
+
+
+@pytest.mark.asyncio
+async def test_read_lines_rejects_overlong_line() -> None:
+    data = b"x" * (MAX_IMPORT_LINE_LENGTH + 10)
+
+    with pytest.raises(ValueError):
+        await collect(read_lines(chunks_of(data, 4096)))
+
+
+@pytest.mark.asyncio
+async def test_parse_csv_records() -> None:
+    data = (
+        "title,author,recommender,year_published,is_read\n"
+        '"Notes, from ""Underground""",Dostoevsky,Peterson,1864,true\n'
+        '"Multi\nline",Orwell,Prager,1949,\n'
+        "Bad,Orwell,Prager,soon,no\n"
+        "Short,Orwell\n"
+    ).encode()
+
+    records = await collect(parse_records(chunks_of(data), CSV_MEDIA_TYPE))
+
+    assert [line for line, _ in records] == [2, 3, 5, 6]
+    assert records[0][1] == ImportRow(
+        title='Notes, from "Underground"',
+        author="Dostoevsky",
+        recommender="Peterson",
+        year_published=1864,
+        is_read=True,
+    )
+    assert records[1][1].title == "Multi\nline"
+    assert records[1][1].is_read is None
+    assert "year_published" in records[2][1]
+    assert "Expected 5 columns" in records[3][1]
+
+
+@pytest.mark.asyncio
+async def test_parse_ndjson_records() -> None:
+    data = (
+        b'{"title": "1984", "author": "Orwell", "recommender": "Prager",'
+        b' "year_published": 1949}\n'
+        b"not json\n"
+        b"[1, 2]\n"
+    )
+
+    records = await collect(parse_records(chunks_of(data), NDJSON_MEDIA_TYPE))
+
+    assert records[0] == (
+        1,
+        ImportRow(
+            title="1984", author="Orwell", recommender="Prager", year_published=1949
+        ),
+    )
+    assert records[1] == (2, "Invalid JSON.")
+    assert records[2] == (3, "Expected a JSON object.")
+
+
+@pytest.mark.asyncio
+async def test_parse_records_rejects_values_the_columns_cannot_hold() -> None:
+    data = (
+        "title,author,recommender,year_published\n"
+        f"{'x' * 65},Orwell,Prager,1949\n"
+        f"1984,{'y' * 65},Prager,1949\n"
+        "1984,Orwell,Prager,10000000000\n"
+        f"{'x' * 64},Orwell,Prager,1949\n"
+    ).encode()
+
+    records = await collect(parse_records(chunks_of(data), CSV_MEDIA_TYPE))
+
+    assert "title" in records[0][1]
+    assert "author" in records[1][1]
+    assert "year_published" in records[2][1]
+    assert isinstance(records[3][1], ImportRow)
@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from core.selection import requested_expansions, requested_fields, split_choices
+from schemas import BookExpansion
+
+
+def test_split_choices_drops_repeats_in_order() -> None:
+    assert split_choices("b, a,b", ["a", "b"], "fields") == ["b", "a"]
+
+
+def test_split_choices_rejects_unknown_entries() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        split_choices("a,c", ["a", "b"], "fields")
+    assert exc_info.value.status_code == 422
+    assert "c" in exc_info.value.detail
+
+
+def test_requested_expansions_parses_known_relations() -> None:
+    assert requested_expansions(None) == []
+    assert requested_expansions("recommender,author") == [
+        BookExpansion.RECOMMENDER,
+        BookExpansion.AUTHOR,
+    ]
+
+
+def test_requested_fields_cannot_be_combined_with_expand() -> None:
+    assert requested_fields(None, [BookExpansion.AUTHOR]) is None
+    assert requested_fields("title,id", []) == ["title", "id"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        requested_fields("title", [BookExpansion.AUTHOR])
+    assert exc_info.value.status_code == 422
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import models
 from crud import authors
 from exceptions.exceptions import EntityAlreadyExistsError, EntityDoesNotExistError
-from schemas import Author, AuthorCreate, AuthorUpdate
+from schemas import Author, AuthorCreate, AuthorUpdate, BulkStatus
 
 
 @pytest.mark.asyncio
@@ -156,3 +156,56 @@ async def test_delete_author(testing_session: AsyncSession) -> None:
     assert await authors.read_authors(testing_session) == []
 
     del result
+
+
+@pytest.mark.asyncio
+async def test_update_nonexistent_author_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await authors.update_author(99, AuthorUpdate(name="Doe, John"), testing_session)
+
+
+@pytest.mark.asyncio
+async def test_delete_nonexistent_author_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await authors.delete_author(99, testing_session)
+
+
+@pytest.mark.asyncio
+async def test_create_authors_skips_existing_names(
+    testing_session: AsyncSession,
+) -> None:
+    params = [AuthorCreate(name="Orwell, George"), AuthorCreate(name="Doe, John")]
+
+    results = await authors.create_authors(params, testing_session)
+
+    assert [result.status for result in results] == [
+        BulkStatus.CONFLICT,
+        BulkStatus.CREATED,
+    ]
+    assert results[1].item.name == "Doe, John"
+
+
+@pytest.mark.asyncio
+async def test_resolve_authors_creates_missing_authors(
+    testing_session: AsyncSession,
+) -> None:
+    result = await authors.resolve_authors(
+        ["Doe, John", "Orwell, George"], testing_session
+    )
+
+    assert result[1] == Author(id=1, name="Orwell, George")
+    assert await authors.read_author(result[0].id, testing_session) == result[0]
+
+
+@pytest.mark.asyncio
+async def test_read_authors_by_ids_reports_missing_ids(
+    testing_session: AsyncSession,
+) -> None:
+    result, missing = await authors.read_authors_by_ids([5, 1], testing_session)
+
+    assert result == [Author(id=1, name="Orwell, George")]
+    assert missing == [5]
@@ -1,11 +1,25 @@
 import pytest
 from pydantic import ValidationError
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
 from crud import books
 from exceptions.exceptions import EntityDoesNotExistError
-from schemas import Book, BookCreate, BookUpdate
+from schemas import (
+    Book,
+    BookCreate,
+    BookExpanded,
+    BookExpansion,
+    BookFilters,
+    BookFlag,
+    BookSort,
+    BookUpdate,
+    BulkStatus,
+    ImportRow,
+    ImportRowError,
+)
 
 
 async def setup_books_table(session: AsyncSession) -> None:
@@ -228,6 +242,148 @@ async def test_read_books(testing_session: AsyncSession) -> None:
     del result
 
 
+@pytest.mark.asyncio
+async def test_find_books_paginates_by_id(testing_session: AsyncSession) -> None:
+    # Setup, then add two more test books
+    await setup_books_table(testing_session)
+    for title in ["Animal Farm", "Homage to Catalonia"]:
+        await books.create_book(
+            BookCreate(author_id=1, recommender_id=1, title=title, year_published=1945),
+            testing_session,
+        )
+
+    first_page = await books.find_books(testing_session, limit=2)
+    second_page = await books.find_books(
+        testing_session, limit=2, after=first_page[-1].id
+    )
+
+    assert [book.id for book in first_page] == [1, 2]
+    assert [book.id for book in second_page] == [3]
+
+
+@pytest.mark.asyncio
+async def test_find_books_filters_and_pages_in_sort_order(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+    new_books = [("Animal Farm", 1945), ("Burmese Days", 1934), ("Coda", 1945)]
+    for title, year in new_books:
+        await books.create_book(
+            BookCreate(author_id=1, recommender_id=1, title=title, year_published=year),
+            testing_session,
+        )
+    filters = BookFilters(author_id=1, is_read=False, sort=BookSort.YEAR_PUBLISHED_DESC)
+
+    first_page = await books.find_books(testing_session, limit=2, filters=filters)
+    second_page = await books.find_books(
+        testing_session,
+        limit=2,
+        after=first_page[-1].id,
+        filters=filters,
+        after_value=first_page[-1].year_published,
+    )
+
+    assert [book.title for book in first_page] == ["Coda", "Animal Farm"]
+    assert [book.title for book in second_page] == ["Burmese Days"]
+    assert not await books.find_books(testing_session, filters=BookFilters(author_id=2))
+
+
+@pytest.mark.asyncio
+async def test_read_book_embeds_requested_expansions(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.read_book(1, testing_session, [BookExpansion.AUTHOR])
+
+    assert isinstance(result, BookExpanded)
+    assert result.author.name == "Orwell, George"
+    assert result.recommender is None
+    assert not isinstance(await books.read_book(1, testing_session), BookExpanded)
+
+
+@pytest.mark.asyncio
+async def test_stream_books_embeds_requested_expansions(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+    expand = [BookExpansion.AUTHOR, BookExpansion.RECOMMENDER]
+
+    chunks = [
+        chunk async for chunk in books.stream_books(testing_session, expand=expand)
+    ]
+
+    assert chunks[0][0].author.name == "Orwell, George"
+    assert chunks[0][0].recommender.id == 1
+
+
+@pytest.mark.asyncio
+async def test_read_books_selects_only_requested_fields(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+    filters = BookFilters(sort=BookSort.TITLE)
+
+    result = await books.read_books(
+        testing_session, filters=filters, fields=["is_read"]
+    )
+
+    assert [book.model_dump() for book in result] == [
+        {"id": 1, "title": "1984", "is_read": True}
+    ]
+    assert not testing_session.in_transaction()
+
+
+def test_book_columns_ignore_the_order_fields_are_listed_in() -> None:
+    assert books.book_columns(["is_read", "title"], "year_published") == (
+        "id",
+        "year_published",
+        "title",
+        "is_read",
+    )
+    assert books.book_columns(["is_read", "title"]) == books.book_columns(
+        ["title", "is_read"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_book_with_fields_raises_for_missing_book(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.read_book(1, testing_session, fields=["title"])
+
+    assert result.model_dump() == {"id": 1, "title": "1984"}
+    with pytest.raises(EntityDoesNotExistError):
+        await books.read_book(9, testing_session, fields=["title"])
+
+
+@pytest.mark.asyncio
+async def test_read_books_releases_connection(testing_session: AsyncSession) -> None:
+    await setup_books_table(testing_session)
+
+    await books.read_book(1, testing_session)
+    assert not testing_session.in_transaction()
+
+    await books.read_books(testing_session)
+    assert not testing_session.in_transaction()
+
+
+@pytest.mark.asyncio
+async def test_stream_books_yields_chunks_of_books(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    chunks = [chunk async for chunk in books.stream_books(testing_session)]
+
+    assert len(chunks) == 1
+    assert isinstance(chunks[0][0], Book)
+    assert [book.title for book in chunks[0]] == ["1984"]
+    assert [chunk async for chunk in books.stream_books(testing_session, 1)] == []
+
+
 @pytest.mark.asyncio
 async def test_update_improper_book_raises_ValidationError(
     testing_session: AsyncSession,
@@ -274,6 +430,130 @@ async def test_update_book_with_improper_foreign_keys_raises_EntityDoesNotExistE
         )
 
 
+@pytest.mark.asyncio
+async def test_create_book_with_improper_foreign_keys_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError, match="Author with id 2"):
+        await books.create_book(
+            BookCreate(
+                author_id=2, recommender_id=1, title="1984", year_published=1949
+            ),
+            testing_session,
+        )
+    with pytest.raises(EntityDoesNotExistError, match="Recommender with id 3"):
+        await books.create_book(
+            BookCreate(
+                author_id=1, recommender_id=3, title="1984", year_published=1949
+            ),
+            testing_session,
+        )
+    assert await books.read_books(testing_session) == []
+
+
+def test_update_book_rejects_null_for_required_fields() -> None:
+    with pytest.raises(ValidationError):
+        BookUpdate(author_id=None)
+    with pytest.raises(ValidationError):
+        BookUpdate(title=None)
+    assert BookUpdate(is_read=None).model_dump(exclude_unset=True) == {"is_read": None}
+
+
+@pytest.mark.asyncio
+async def test_update_book_reraises_integrity_errors_other_than_references(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+    with pytest.raises(IntegrityError):
+        await books.update_book(
+            1, BookUpdate.model_construct(title=None), testing_session
+        )
+
+
+@pytest.mark.asyncio
+async def test_update_book_reports_missing_book_before_references(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError, match="Book with id 9"):
+        await books.update_book(9, BookUpdate(author_id=2), testing_session)
+
+
+@pytest.mark.asyncio
+async def test_book_writes_run_a_single_statement(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+    statements = []
+
+    def count(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    engine = testing_session.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        await books.create_book(
+            BookCreate(
+                author_id=1, recommender_id=1, title="Animal Farm", year_published=1945
+            ),
+            testing_session,
+        )
+        await books.update_book(
+            2, BookUpdate(author_id=1, recommender_id=1), testing_session
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert [statement.split()[0] for statement in statements] == ["INSERT", "UPDATE"]
+
+
+@pytest.mark.asyncio
+async def test_set_book_flag_updates_only_that_flag(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.set_book_flag(1, BookFlag.READ, False, testing_session)
+
+    assert not result.is_read
+    assert result.is_purchased
+    with pytest.raises(EntityDoesNotExistError):
+        await books.set_book_flag(9, BookFlag.PURCHASED, True, testing_session)
+
+
+@pytest.mark.asyncio
+async def test_update_books_reports_outcome_per_id(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.update_books(
+        [9, 1], BookUpdate(is_read=False), testing_session
+    )
+
+    assert [(r.item, r.status) for r in result] == [
+        (9, BulkStatus.NOT_FOUND),
+        (1, BulkStatus.UPDATED),
+    ]
+    assert not (await books.read_book(1, testing_session)).is_read
+    with pytest.raises(EntityDoesNotExistError, match="Author with id 2"):
+        await books.update_books([1], BookUpdate(author_id=2), testing_session)
+
+
+@pytest.mark.asyncio
+async def test_delete_books_reports_outcome_per_id(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.delete_books([1, 9], testing_session)
+
+    assert [(r.item, r.status) for r in result] == [
+        (1, BulkStatus.DELETED),
+        (9, BulkStatus.NOT_FOUND),
+    ]
+    assert await books.read_books(testing_session) == []
+
+
 @pytest.mark.asyncio
 async def test_update_book_regular(testing_session: AsyncSession) -> None:
     # Setup, then add another test author
@@ -324,3 +604,119 @@ async def test_delete_book(testing_session: AsyncSession) -> None:
     assert await books.read_books(testing_session) == []
 
     del result
+
+
+@pytest.mark.asyncio
+async def test_update_nonexistent_book_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await books.update_book(1, BookUpdate(title="1985"), testing_session)
+
+
+@pytest.mark.asyncio
+async def test_update_book_without_changes_returns_book(
+    testing_session: AsyncSession,
+) -> None:
+    await setup_books_table(testing_session)
+
+    result = await books.update_book(1, BookUpdate(), testing_session)
+
+    assert result.id == 1
+    assert result.title == "1984"
+
+
+@pytest.mark.asyncio
+async def test_delete_nonexistent_book_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await books.delete_book(1, testing_session)
+
+
+@pytest.mark.asyncio
+async def test_create_books_inserts_valid_items_in_order(
+    testing_session: AsyncSession,
+) -> None:
+    params = [
+        BookCreate(author_id=1, recommender_id=1, title="1984", year_published=1949),
+        BookCreate(author_id=1, recommender_id=9, title="Nope", year_published=1),
+        BookCreate(
+            author_id=1, recommender_id=1, title="Animal Farm", year_published=1945
+        ),
+    ]
+
+    results = await books.create_books(params, testing_session)
+
+    assert [result.index for result in results] == [0, 1, 2]
+    assert [result.status for result in results] == [
+        BulkStatus.CREATED,
+        BulkStatus.INVALID,
+        BulkStatus.CREATED,
+    ]
+    assert results[0].item.title == "1984"
+    assert results[2].item.title == "Animal Farm"
+    assert len(await books.read_books(testing_session)) == 2
+
+
+@pytest.mark.asyncio
+async def test_create_books_reports_references_deleted_before_the_insert(
+    monkeypatch, testing_session: AsyncSession
+) -> None:
+    await testing_session.execute(text("PRAGMA foreign_keys = ON"))
+    check_references = books._valid_references
+    calls = []
+
+    async def stale_then_current(params, indexes, results, session):
+        calls.append(list(indexes))
+        if len(calls) == 1:
+            # As if author 2 existed when checked but was deleted right after
+            return list(indexes)
+        return await check_references(params, indexes, results, session)
+
+    monkeypatch.setattr(books, "_valid_references", stale_then_current)
+    params = [
+        BookCreate(author_id=1, recommender_id=1, title="1984", year_published=1949),
+        BookCreate(author_id=2, recommender_id=1, title="Gone", year_published=1),
+    ]
+
+    try:
+        results = await books.create_books(params, testing_session)
+    finally:
+        await testing_session.execute(text("PRAGMA foreign_keys = OFF"))
+
+    assert [result.status for result in results] == [
+        BulkStatus.CREATED,
+        BulkStatus.INVALID,
+    ]
+    assert results[1].detail == "Author with id 2 does not exist."
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_import_books_commits_in_chunks_and_reports_errors(
+    monkeypatch, testing_session: AsyncSession
+) -> None:
+    monkeypatch.setattr(books, "IMPORT_CHUNK_SIZE", 2)
+    monkeypatch.setattr("schemas.imports.MAX_IMPORT_ERRORS", 1)
+
+    async def records():
+        for line in range(1, 6):
+            yield line, ImportRow(
+                title=f"Book {line}",
+                author="New Author",
+                recommender="Peterson, Jordan",
+                year_published=2000 + line,
+            )
+        yield 6, "year_published: invalid"
+        yield 7, "Invalid JSON."
+
+    report = await books.import_books(records(), testing_session)
+
+    assert report.imported == 5
+    assert report.failed == 2
+    assert report.errors == [ImportRowError(line=6, detail="year_published: invalid")]
+    imported = await books.read_books(testing_session)
+    assert [book.title for book in imported] == [f"Book {n}" for n in range(1, 6)]
+    assert len({book.author_id for book in imported}) == 1
+    assert {book.recommender_id for book in imported} == {1}
@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import models
+from core.counting import count_cache
+from crud import common
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_by_name_returns_existing_and_new_ids(
+    testing_session: AsyncSession,
+) -> None:
+    ids = await common.get_or_create_by_name(
+        testing_session, models.Author, ["Orwell, George", "Doe, John", "Doe, John"]
+    )
+
+    assert ids["Orwell, George"] == 1
+    assert ids["Doe, John"] not in (None, 1)
+    assert await testing_session.scalar(select(func.count(models.Author.id))) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_by_name_resolves_names_in_chunks(
+    monkeypatch, testing_session: AsyncSession
+) -> None:
+    monkeypatch.setattr(common, "SQLITE_CHUNK_SIZE", 2)
+    names = [f"Recommender {n}" for n in range(5)]
+
+    ids = await common.get_or_create_by_name(testing_session, models.Recommender, names)
+
+    assert sorted(ids) == names
+    assert len(set(ids.values())) == 5
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_by_name_accepts_no_names(
+    testing_session: AsyncSession,
+) -> None:
+    assert await common.get_or_create_by_name(testing_session, models.Author, []) == {}
+
+
+class PostgresSession:
+    """Stands in for an AsyncSession bound to PostgreSQL, returning canned rows."""
+
+    def __init__(self, rows):
+        self.bind = SimpleNamespace(dialect=postgresql.dialect())
+        self.sync_session = Session()
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=self.bind.dialect)))
+        return self.rows
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_by_name_on_postgres_invalidates_counts() -> None:
+    session = PostgresSession([(7, "Doe, Jane")])
+    count_cache.clear()
+    count_cache.set("dim_authors", (), 1)
+
+    ids = await common.get_or_create_by_name(session, models.Author, ["Doe, Jane"])
+    session.sync_session.commit()
+
+    assert ids == {"Doe, Jane": 7}
+    assert "ON CONFLICT (name) DO NOTHING" in session.statements[0]
+    assert count_cache.get("dim_authors") is None
+
+
+@pytest.mark.asyncio
+async def test_count_rows_is_cached_until_the_table_is_written(
+    testing_session: AsyncSession,
+) -> None:
+    count_cache.clear()
+    stmt = select(models.Author.id)
+
+    assert await common.count_rows(testing_session, stmt, "dim_authors") == 1
+    count_cache.set("dim_authors", (), 5)
+    assert await common.count_rows(testing_session, stmt, "dim_authors") == 5
+
+    await common.get_or_create_by_name(testing_session, models.Author, ["Doe, Jane"])
+    await testing_session.commit()
+
+    assert await common.count_rows(testing_session, stmt, "dim_authors") == 2
+
+
+@pytest.mark.asyncio
+async def test_estimate_rows_is_postgres_only(testing_session: AsyncSession) -> None:
+    assert await common.estimate_rows(testing_session, "fct_books") is None
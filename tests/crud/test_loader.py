@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import asyncpg
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud import books, loader
+from exceptions.exceptions import ServiceError
+from schemas import ImportReport, ImportRow
+
+
+async def records():
+    yield 1, ImportRow(
+        title="1984", author="Orwell, George", recommender="Prager", year_published=1949
+    )
+    yield 2, "year_published: invalid"
+
+
+@pytest.mark.asyncio
+async def test_staged_rows_yield_copy_records_and_report_rejects() -> None:
+    report = ImportReport()
+
+    rows = [row async for row in loader._staged_rows(records(), report)]
+
+    assert rows == [("1984", "Orwell, George", "Prager", 1949, None, None)]
+    assert report.failed == 1
+    assert report.errors[0].line == 2
+
+
+@pytest.mark.asyncio
+async def test_load_books_falls_back_to_chunked_import_on_sqlite(
+    testing_session: AsyncSession,
+) -> None:
+    report = await loader.load_books(records(), testing_session)
+
+    assert report.imported == 1
+    assert report.failed == 1
+    assert [book.title for book in await books.read_books(testing_session)] == ["1984"]
+
+
+class FailingCopySession:
+    """Stands in for a PostgreSQL session whose COPY the server rejects."""
+
+    bind = SimpleNamespace(dialect=postgresql.dialect())
+
+    async def execute(self, stmt) -> None:
+        pass
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return SimpleNamespace(driver_connection=self)
+
+    async def copy_records_to_table(self, table, records, columns) -> None:
+        raise asyncpg.DataError("value too long for type character varying(64)")
+
+
+@pytest.mark.asyncio
+async def test_load_books_raises_ServiceError_when_copy_fails() -> None:
+    with pytest.raises(ServiceError):
+        await loader.load_books(records(), FailingCopySession())
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import models
 from crud import recommenders
 from exceptions.exceptions import EntityAlreadyExistsError, EntityDoesNotExistError
-from schemas import Recommender, RecommenderCreate, RecommenderUpdate
+from schemas import BulkStatus, Recommender, RecommenderCreate, RecommenderUpdate
 
 
 @pytest.mark.asyncio
@@ -168,3 +168,51 @@ async def test_delete_recommender(testing_session: AsyncSession) -> None:
     assert await recommenders.read_recommenders(testing_session) == []
 
     del result
+
+
+@pytest.mark.asyncio
+async def test_update_nonexistent_recommender_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await recommenders.update_recommender(
+            99, RecommenderUpdate(name="Doe, John"), testing_session
+        )
+
+
+@pytest.mark.asyncio
+async def test_delete_nonexistent_recommender_raises_EntityDoesNotExistError(
+    testing_session: AsyncSession,
+) -> None:
+    with pytest.raises(EntityDoesNotExistError):
+        await recommenders.delete_recommender(99, testing_session)
+
+
+@pytest.mark.asyncio
+async def test_create_recommenders_skips_existing_names(
+    testing_session: AsyncSession,
+) -> None:
+    params = [
+        RecommenderCreate(name="Doe, John"),
+        RecommenderCreate(name="Doe, John"),
+    ]
+
+    results = await recommenders.create_recommenders(params, testing_session)
+
+    assert [result.status for result in results] == [
+        BulkStatus.CREATED,
+        BulkStatus.CONFLICT,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_resolve_recommenders_keeps_request_order(
+    testing_session: AsyncSession,
+) -> None:
+    names = ["Doe, John", "Peterson, Jordan", "Doe, John"]
+
+    result = await recommenders.resolve_recommenders(names, testing_session)
+
+    assert [recommender.name for recommender in result] == names
+    assert result[1].id == 1
+    assert result[0].id == result[2].id
@@ -0,0 +1,81 @@
+from database.breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker("Test", failure_threshold=3, reset_timeout=10.0, clock=clock)
+
+
+def test_breaker_opens_after_consecutive_failures() -> None:
+    breaker = make_breaker(FakeClock())
+
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_success_resets_failure_count() -> None:
+    breaker = make_breaker(FakeClock())
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_breaker_lets_one_probe_through_after_reset_timeout() -> None:
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 10.0
+
+    assert breaker.allow_request()
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_closes_when_probe_succeeds() -> None:
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10.0
+    breaker.allow_request()
+
+    breaker.record_success()
+
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_reopens_when_probe_fails() -> None:
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10.0
+    breaker.allow_request()
+
+    breaker.record_failure()
+
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 19.0
+    assert not breaker.allow_request()
+    clock.now = 20.0
+    assert breaker.allow_request()
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from database.pool import BoundedQueuePool, PoolQueueFullError
+from database.session import DatabaseSessionManager
+from exceptions.exceptions import ServiceUnavailableError
+
+
+def make_manager(tmp_path, max_waiters: int) -> DatabaseSessionManager:
+    return DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=BoundedQueuePool,
+        max_waiters=max_waiters,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_checkout_when_wait_queue_is_full(tmp_path) -> None:
+    manager = make_manager(tmp_path, max_waiters=0)
+
+    async with manager.engine.connect() as held:
+        await held.execute(text("SELECT 1"))
+        with pytest.raises(PoolQueueFullError):
+            async with manager.engine.connect():
+                pass
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_queues_checkout_while_wait_queue_has_room(tmp_path) -> None:
+    manager = make_manager(tmp_path, max_waiters=1)
+
+    async def release_later(connection) -> None:
+        await asyncio.sleep(0.02)
+        await connection.close()
+
+    held = await manager.engine.connect().start()
+    release = asyncio.create_task(release_later(held))
+    async with manager.engine.connect() as queued:
+        assert (await queued.execute(text("SELECT 1"))).scalar_one() == 1
+    await release
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_raises_ServiceUnavailableError_when_pool_is_exhausted(
+    tmp_path,
+) -> None:
+    manager = make_manager(tmp_path, max_waiters=0)
+
+    async with manager.session() as holder:
+        await holder.execute(text("SELECT 1"))
+        with pytest.raises(ServiceUnavailableError):
+            async with manager.session() as session:
+                await session.execute(text("SELECT 1"))
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_queue_depth_after_recreate(tmp_path) -> None:
+    manager = make_manager(tmp_path, max_waiters=3)
+
+    pool = manager.engine.pool.recreate()
+
+    assert isinstance(pool, BoundedQueuePool)
+    assert pool._max_waiters == 3
+
+    await manager.close()
@@ -1,12 +1,32 @@
+import asyncio
 from typing import AsyncGenerator
 
 import pytest
 import pytest_asyncio
-from sqlalchemy import StaticPool, text
-from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from pydantic import ValidationError
+from sqlalchemy import NullPool, StaticPool, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
 
-from database.session import DatabaseSessionManager
-from exceptions.exceptions import ServiceError
+from config.settings import Settings, settings
+from database.breaker import CircuitState
+from database.pool import BoundedQueuePool
+from database.session import (
+    DatabaseSessionManager,
+    create_sqlite_sessionmanager,
+    engine_options,
+    release_connection,
+)
+from exceptions.exceptions import (
+    DeadlineExceededError,
+    ServiceError,
+    ServiceUnavailableError,
+)
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
@@ -95,3 +115,303 @@ async def test_session_yields_session(
 ) -> None:
     async with testing_manager.session() as session:
         assert isinstance(session, AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def replicated_manager(
+    tmp_path,
+) -> AsyncGenerator[DatabaseSessionManager, None]:
+    manager = DatabaseSessionManager(
+        DATABASE_URL,
+        replica_hosts=[
+            f"sqlite+aiosqlite:///{tmp_path / 'replica-1.db'}",
+            f"sqlite+aiosqlite:///{tmp_path / 'replica-2.db'}",
+        ],
+        connect_args={"check_same_thread": False},
+    )
+    try:
+        yield manager
+    finally:
+        await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_routes_reads_to_replicas_in_turn(
+    replicated_manager: DatabaseSessionManager,
+) -> None:
+    bound_engines = []
+    for _ in range(4):
+        async with replicated_manager.session(read_only=True) as session:
+            bound_engines.append(session.bind)
+
+    replicas = replicated_manager.replica_engines
+    assert bound_engines == replicas + replicas
+
+
+@pytest.mark.asyncio
+async def test_session_routes_writes_to_primary(
+    replicated_manager: DatabaseSessionManager,
+) -> None:
+    async with replicated_manager.session() as session:
+        assert session.bind is replicated_manager.engine
+
+
+@pytest.mark.asyncio
+async def test_session_falls_back_to_primary_when_replicas_are_down() -> None:
+    manager = DatabaseSessionManager(
+        DATABASE_URL,
+        replica_hosts=["sqlite+aiosqlite:////nonexistent/replica.db"],
+        connect_args={"check_same_thread": False},
+    )
+
+    # Even the first read, which still picks the dead replica, is served
+    for _ in range(2):
+        async with manager.session(read_only=True) as session:
+            assert session.bind is manager.engine
+            assert (await session.execute(text("SELECT 1"))).scalar_one() == 1
+    assert manager._replica_breakers[0].state is CircuitState.OPEN
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_keeps_replica_in_rotation_when_its_pool_is_full(
+    tmp_path,
+) -> None:
+    manager = DatabaseSessionManager(
+        DATABASE_URL,
+        replica_hosts=[f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}"],
+        replica_engine_kwargs=dict(
+            poolclass=BoundedQueuePool, pool_size=1, max_overflow=0, max_waiters=0
+        ),
+        connect_args={"check_same_thread": False},
+    )
+
+    async with manager.session(read_only=True):
+        with pytest.raises(ServiceUnavailableError):
+            async with manager.session(read_only=True):
+                pass
+    assert manager._replica_breakers[0].state is CircuitState.CLOSED
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_pool_with_idle_connections(tmp_path) -> None:
+    manager = DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=5
+    )
+
+    await manager.warm_up(3)
+
+    assert manager.engine.pool.checkedin() == 3
+    assert manager.engine.pool.checkedout() == 0
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_release_connection_keeps_loaded_rows_usable(
+    testing_manager: DatabaseSessionManager,
+) -> None:
+    async with testing_manager.session() as session:
+        result = (await session.execute(text("SELECT 1 AS one"))).one()
+        assert session.in_transaction()
+
+        await release_connection(session)
+
+        assert not session.in_transaction()
+        assert result.one == 1
+
+
+def test_engine_options_configure_pool_from_settings() -> None:
+    config = settings.model_copy(
+        update={"max_connections_count": 7, "pool_max_overflow": 3}
+    )
+
+    options = engine_options(config)
+
+    assert options["pool_size"] == 7
+    assert options["max_overflow"] == 3
+    assert "poolclass" not in options
+
+
+def test_engine_options_bound_wait_queue_when_configured() -> None:
+    options = engine_options(settings.model_copy(update={"pool_max_waiters": 5}))
+
+    assert options["poolclass"] is BoundedQueuePool
+    assert options["max_waiters"] == 5
+
+
+def test_engine_options_for_external_pooler_disable_statement_cache() -> None:
+    options = engine_options(settings.model_copy(update={"db_external_pooler": True}))
+    engine = create_async_engine("postgresql+asyncpg://u:p@localhost/db", **options)
+
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    name_func = options["connect_args"]["prepared_statement_name_func"]
+    assert name_func() != name_func()
+    assert isinstance(engine.pool, NullPool)
+
+
+def test_engine_options_for_external_pooler_with_small_pool() -> None:
+    options = engine_options(
+        settings.model_copy(
+            update={"db_external_pooler": True, "db_external_pooler_pool_size": 2}
+        )
+    )
+
+    assert options["pool_size"] == 2
+    assert options["max_overflow"] == 0
+    assert "poolclass" not in options
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout_is_ignored_on_sqlite(
+    testing_manager: DatabaseSessionManager,
+) -> None:
+    async with testing_manager.session(statement_timeout=0.5) as session:
+        assert await session.scalar(text("SELECT 1")) == 1
+
+
+@pytest.mark.asyncio
+async def test_session_raises_DeadlineExceededError_for_canceled_query(
+    testing_manager: DatabaseSessionManager,
+) -> None:
+    class QueryCanceled(Exception):
+        sqlstate = "57014"
+
+    with pytest.raises(DeadlineExceededError):
+        async with testing_manager.session(statement_timeout=0.5):
+            raise DBAPIError("SELECT pg_sleep(1)", None, QueryCanceled())
+
+
+@pytest_asyncio.fixture
+async def sqlite_manager(tmp_path) -> AsyncGenerator[DatabaseSessionManager, None]:
+    config = settings.model_copy(
+        update={"db_sqlite_path": str(tmp_path / "aklatan.db"), "pool_timeout": 5.0}
+    )
+    manager = create_sqlite_sessionmanager(config)
+    try:
+        yield manager
+    finally:
+        await manager.close()
+
+
+def test_engine_options_for_sqlite_use_single_writer() -> None:
+    options = engine_options(settings.model_copy(update={"db_sqlite_path": "x.db"}))
+
+    assert options["pool_size"] == 1
+    assert options["max_overflow"] == 0
+
+
+def test_settings_require_credentials_unless_sqlite(monkeypatch) -> None:
+    for name in ("DB_USER", "DB_PASSWORD", "DB_NAME"):
+        monkeypatch.delenv(name, raising=False)
+
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None)
+
+    config = Settings(_env_file=None, db_sqlite_path="aklatan.db")
+    assert config.database_url.get_secret_value() == "sqlite+aiosqlite:///aklatan.db"
+
+
+@pytest.mark.asyncio
+async def test_sqlite_sessionmanager_applies_pragmas(
+    sqlite_manager: DatabaseSessionManager,
+) -> None:
+    async with sqlite_manager.session() as session:
+        assert await session.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert await session.scalar(text("PRAGMA foreign_keys")) == 1
+        assert await session.scalar(text("PRAGMA query_only")) == 0
+
+    async with sqlite_manager.session(read_only=True) as session:
+        assert session.bind is sqlite_manager.replica_engines[0]
+        assert await session.scalar(text("PRAGMA query_only")) == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_sessionmanager_serializes_concurrent_writes(
+    sqlite_manager: DatabaseSessionManager,
+) -> None:
+    async with sqlite_manager.session() as session:
+        await session.execute(text("CREATE TABLE counter (n INTEGER)"))
+        await session.commit()
+
+    async def write(n: int) -> None:
+        async with sqlite_manager.session() as session:
+            await session.execute(text("INSERT INTO counter VALUES (:n)"), {"n": n})
+            await asyncio.sleep(0.01)
+            await session.commit()
+
+    await asyncio.gather(*(write(n) for n in range(10)))
+
+    async with sqlite_manager.session(read_only=True) as session:
+        assert await session.scalar(text("SELECT count(*) FROM counter")) == 10
+
+
+@pytest.mark.asyncio
+async def test_session_fails_fast_once_circuit_is_open(tmp_path) -> None:
+    manager = DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        breaker_failure_threshold=2,
+        breaker_reset_seconds=0.05,
+    )
+
+    for _ in range(2):
+        with pytest.raises(ServiceError):
+            async with manager.session():
+                raise OperationalError("SELECT 1", None, OSError("Connection refused"))
+    with pytest.raises(ServiceUnavailableError):
+        async with manager.session():
+            pass
+
+    await asyncio.sleep(0.05)
+    async with manager.session() as session:
+        assert (await session.execute(text("SELECT 1"))).scalar_one() == 1
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_counts_connect_timeouts_as_failures(
+    monkeypatch, tmp_path
+) -> None:
+    manager = DatabaseSessionManager(
+        f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+        breaker_failure_threshold=1,
+        breaker_reset_seconds=0,
+    )
+
+    with pytest.raises(ServiceError):
+        async with manager.session():
+            raise asyncio.TimeoutError
+    assert manager._breaker.state is not CircuitState.CLOSED
+
+    def connect_timing_out(self: AsyncEngine) -> AsyncConnection:
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(AsyncEngine, "connect", connect_timing_out)
+    with pytest.raises(ServiceUnavailableError):
+        async with manager.session():
+            pass
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_keeps_circuit_open_while_probe_fails() -> None:
+    manager = DatabaseSessionManager(
+        "sqlite+aiosqlite:////nonexistent/primary.db",
+        breaker_failure_threshold=1,
+        breaker_reset_seconds=0,
+    )
+
+    with pytest.raises(ServiceError):
+        async with manager.session() as session:
+            await session.execute(text("SELECT 1"))
+    with pytest.raises(ServiceUnavailableError):
+        async with manager.session():
+            pass
+
+    await manager.close()
@@ -9,7 +9,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from auth.dependencies import get_current_active_user
 from auth.models import User
 from auth.utils import create_access_token
-from database.session import DatabaseSessionManager, get_db_session
+from database.session import (
+    DatabaseSessionManager,
+    get_db_session,
+    get_read_db_session,
+)
+from exceptions.exceptions import DeadlineExceededError, ServiceUnavailableError
 from main import app
 
 URL_PREFIX = "api/v1/"
@@ -392,6 +397,7 @@ async def test_main_returns_http_403_for_deactivated_user(
         yield testing_session
 
     app.dependency_overrides[get_db_session] = override_db
+    app.dependency_overrides[get_read_db_session] = override_db
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -586,6 +592,7 @@ async def test_main_returns_http_500_for_internal_server_error(testing_data) ->
         )
 
     app.dependency_overrides[get_db_session] = override_db
+    app.dependency_overrides[get_read_db_session] = override_db
     app.dependency_overrides[get_current_active_user] = override_user
 
     async with AsyncClient(
@@ -595,3 +602,62 @@ async def test_main_returns_http_500_for_internal_server_error(testing_data) ->
 
         assert response.status_code == 500
         assert "Service is unavailable." in response.text
+
+
+@pytest.mark.asyncio
+async def test_main_returns_http_503_with_retry_after_when_database_is_busy(
+    testing_data,
+) -> None:
+    async def override_db():
+        raise ServiceUnavailableError("Database is busy. Please try again later.")
+        yield
+
+    async def override_user():
+        yield User(
+            username=testing_data["user"]["username"],
+            email=testing_data["user"]["email"],
+            is_active=True,
+        )
+
+    app.dependency_overrides[get_read_db_session] = override_db
+    app.dependency_overrides[get_current_active_user] = override_user
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        try:
+            response = await client.get(URL_PREFIX + "authors/1")
+        finally:
+            app.dependency_overrides = {}
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    assert "Database is busy" in response.text
+
+
+@pytest.mark.asyncio
+async def test_main_returns_http_504_when_deadline_is_exceeded(testing_data) -> None:
+    async def override_db():
+        raise DeadlineExceededError("Request took too long to complete.")
+        yield
+
+    async def override_user():
+        yield User(
+            username=testing_data["user"]["username"],
+            email=testing_data["user"]["email"],
+            is_active=True,
+        )
+
+    app.dependency_overrides[get_read_db_session] = override_db
+    app.dependency_overrides[get_current_active_user] = override_user
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        try:
+            response = await client.get(URL_PREFIX + "authors/1")
+        finally:
+            app.dependency_overrides = {}
+
+    assert response.status_code == 504
+    assert "took too long" in response.text